@@ -0,0 +1,30 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmarks of loading, reloading and accessing settings.
+
+Every scenario runs offline, on temporary files and on a local HTTP
+server, from the root of the repository:
+
+    $ python -m benchmarks                        # every scenario
+    $ python -m benchmarks access layers --quick  # some, fewer rounds
+    $ python -m benchmarks --json baseline.json
+    $ python -m benchmarks --compare baseline.json
+
+Results are written as JSON (see `harness.write`), and compared case by
+case with a baseline: the command fails when a time got slower than the
+baseline by more than the threshold.
+"""
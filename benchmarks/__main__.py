@@ -0,0 +1,71 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+
+from . import __doc__ as description, harness
+
+# imported for their scenarios
+from . import access, layers, load, parsers, reload, startup  # noqa: F401
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=description,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        help=f"some of: {', '.join(harness.scenarios)} (default: all of them)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="smaller sizes and fewer rounds"
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="write the results to PATH ('-': stdout)"
+    )
+    parser.add_argument(
+        "--compare", metavar="BASELINE", help="compare with previous results"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown reported as a regression (default: 0.2, i.e. 20%%)",
+    )
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - harness.scenarios.keys()
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = harness.read(args.compare) if args.compare else None
+    # human readable results go to stderr when JSON is written to stdout
+    out = sys.stderr if args.json == "-" else sys.stdout
+    results = harness.run(args.scenarios or list(harness.scenarios), args.quick, out)
+    if args.json:
+        harness.write(results, args.json)
+    if baseline is not None:
+        regressions = harness.compare(results, baseline, args.threshold, out)
+        if regressions:
+            print(f"{len(regressions)} regressions.", file=out)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
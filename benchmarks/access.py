@@ -0,0 +1,106 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Latency of reading settings: attribute access, lookups by dynamic dotted
+paths against the path index of root settings, copy-on-write handles and
+lazily validated sections, at growing nesting depths.
+"""
+
+import confdoggo
+
+from . import fixtures
+from .harness import scenario
+
+
+class Flag(confdoggo.Settings):
+    enabled: bool = False
+    rollout: float = 0.0
+
+
+class Flags(confdoggo.Settings):
+    class _(confdoggo.Settings):
+        checkout: Flag = Flag()
+        search: Flag = Flag()
+        payments: Flag = Flag()
+
+    web = _()
+
+    class _(confdoggo.Settings):
+        x: int = 42
+
+    client = _()
+
+
+def getattr_path(settings, path):
+    value = settings
+    for key in path.split("."):
+        value = getattr(value, key)
+    return value
+
+
+@scenario("access")
+def access(bench):
+    with fixtures.directory() as directory:
+        path = fixtures.write_json(
+            directory / "flags.json", {"web": {"search": {"enabled": True}}}
+        )
+        settings = confdoggo.go_catch(Flags, [path])
+        handle = confdoggo.go_catch(Flags, [path], copy_on_write=True)
+        lazy = confdoggo.go_catch(Flags, [path], lazy=True)
+        lazy.validate_all()
+    paths = [
+        f"web.{flag}.{value}"
+        for flag in ("checkout", "search", "payments")
+        for value in ("enabled", "rollout")
+    ] + ["client.x"]
+
+    def attribute():
+        settings.web.search.enabled
+
+    def copy_on_write():
+        handle.current().web.search.enabled
+
+    def lazy_attribute():
+        lazy.web.search.enabled
+
+    def nested():
+        for path in paths:
+            getattr_path(settings, path)
+
+    def indexed():
+        for path in paths:
+            settings.get(path)
+
+    def indexed_many():
+        settings.get_many(paths)
+
+    bench.time("attribute", attribute)
+    bench.time("attribute copy-on-write", copy_on_write)
+    bench.time("attribute lazy", lazy_attribute)
+    bench.time("nested getattr", nested, per=len(paths))
+    bench.time("get", indexed, per=len(paths))
+    bench.time("get_many", indexed_many, per=len(paths))
+
+    for depth in bench.sizes([1, 4, 16], [1, 16]):
+        model = fixtures.nested_settings(depth)
+        with fixtures.directory() as directory:
+            path = fixtures.write_json(
+                directory / "nested.json", fixtures.make_nested(depth)
+            )
+            settings = confdoggo.go_catch(model, [path])
+        dotted = fixtures.nested_path(depth)
+        bench.time(f"depth {depth} getattr", lambda: getattr_path(settings, dotted))
+        bench.time(f"depth {depth} get", lambda: settings.get(dotted))
@@ -0,0 +1,136 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Documents, settings classes and sources shared by the scenarios.
+"""
+
+import contextlib
+import functools
+import http.server
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict
+
+import pydantic
+
+import confdoggo
+from confdoggo import core
+
+
+class Flag(confdoggo.Settings):
+    enabled: bool = False
+    rollout: float = 0.0
+    owners: list = []
+    description: str = ""
+
+
+class Flags(confdoggo.Settings):
+    flags: Dict[str, Flag] = {}
+
+
+def make_flags(count: int) -> dict:
+    # a large feature-flags-like document
+    return {
+        "flags": {
+            f"flag-{i}": {
+                "enabled": i % 2 == 0,
+                "rollout": i / count,
+                "owners": ["team-a", "team-b"],
+                "description": f"feature flag number {i}",
+            }
+            for i in range(count)
+        }
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def nested_settings(depth: int):
+    """ A settings class nesting `depth` sections, each with a few fields. """
+    model = pydantic.create_model(
+        "Level0", __base__=confdoggo.Settings, value=(int, 0), name=(str, "")
+    )
+    for level in range(1, depth + 1):
+        model = pydantic.create_model(
+            f"Level{level}",
+            __base__=confdoggo.Settings,
+            value=(int, 0),
+            name=(str, ""),
+            child=(model, model()),
+        )
+    return model
+
+
+def make_nested(depth: int, value=1) -> dict:
+    document = {"value": value, "name": "leaf"}
+    for level in range(depth):
+        document = {"value": value, "name": f"level-{level}", "child": document}
+    return document
+
+
+def nested_path(depth: int) -> str:
+    return ".".join(["child"] * depth + ["value"])
+
+
+def go_catch_uncached(settings_class, configurations, **options):
+    """ A complete `go_catch`, not served by the sources already loaded. """
+    core.sources.clear()
+    return confdoggo.go_catch(settings_class, configurations, **options)
+
+
+def has_os_watcher() -> bool:
+    from confdoggo.watchers import fs
+
+    return fs.has_watchdog
+
+
+@contextlib.contextmanager
+def directory():
+    with tempfile.TemporaryDirectory(prefix="confdoggo-bench-") as path:
+        yield Path(path)
+
+
+def write_json(path: Path, document) -> str:
+    # written aside and renamed, as editors and deployment tools do
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(document))
+    os.replace(str(temporary), str(path))
+    return str(path)
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def http_server(root: Path):
+    """
+    Serves the files in `root` on localhost, standing in for remote
+    sources: supports conditional requests through Last-Modified.
+    """
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
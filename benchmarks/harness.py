@@ -0,0 +1,184 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+import sys
+import time
+import timeit
+from typing import Callable, NamedTuple
+
+import confdoggo
+
+# bumped on incompatible changes of the JSON output
+RESULTS_FORMAT = 1
+
+# units of the metrics that are compared with baselines; lower is better.
+TIME_UNITS = {"ns", "ms"}
+
+
+class Result(NamedTuple):
+    scenario: str
+    case: str
+    metric: str
+    value: float
+    unit: str
+
+    @property
+    def key(self) -> tuple:
+        return self.scenario, self.case, self.metric
+
+
+# name -> function(bench)
+scenarios: dict[str, Callable[[Bench], None]] = {}
+
+
+def scenario(name: str):
+    def register(function):
+        scenarios[name] = function
+        return function
+
+    return register
+
+
+class Bench:
+    """ Handed to scenarios, to time their cases and record the results. """
+
+    def __init__(self, quick=False, out=sys.stdout):
+        self.quick = quick
+        self.out = out
+        self.repeat = 3 if quick else 7
+        # minimum duration of a round of repetitions, in seconds
+        self.target = 0.02 if quick else 0.2
+        self.results: list[Result] = []
+        self.scenario = None
+
+    def sizes(self, full: list, quick: list) -> list:
+        return quick if self.quick else full
+
+    def time(self, case: str, function: Callable, per: int = 1, metric="time"):
+        """
+        Records the time of a call of `function` divided by `per`,
+        the number of operations it performs, in nanoseconds.
+        """
+        number = self.calibrate(function)
+        times = timeit.repeat(function, number=number, repeat=self.repeat)
+        # the minimum is the least disturbed by the rest of the machine
+        value = min(times) / number / per * 1e9
+        self.record(case, metric, value, "ns")
+        return value
+
+    def time_once(self, case: str, function: Callable, metric="time"):
+        """ Like `time`, for functions too slow or stateful to be looped. """
+        times = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        value = min(times) * 1e3
+        self.record(case, metric, value, "ms")
+        return value
+
+    def calibrate(self, function: Callable) -> int:
+        number = 1
+        while True:
+            if timeit.timeit(function, number=number) >= self.target:
+                return number
+            number *= 4
+
+    def record(self, case: str, metric: str, value: float, unit: str):
+        result = Result(self.scenario, case, metric, value, unit)
+        self.results.append(result)
+        line = f"{result.scenario:>10} {case:<32} {metric:<14} {format_value(result)}"
+        print(line, file=self.out, flush=True)
+
+    def skip(self, reason: str):
+        print(f"{self.scenario:>10} skipped: {reason}", file=self.out, flush=True)
+
+
+def format_value(result: Result) -> str:
+    if result.unit in TIME_UNITS:
+        return f"{result.value:>12.1f} {result.unit}"
+    return f"{result.value:>12g} {result.unit}"
+
+
+def run(names: list, quick=False, out=sys.stdout) -> list:
+    bench = Bench(quick, out)
+    for name in names:
+        bench.scenario = name
+        scenarios[name](bench)
+    return bench.results
+
+
+def write(results: list, path: str):
+    document = {
+        "format": RESULTS_FORMAT,
+        "confdoggo": str(confdoggo.__version__),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": [result._asdict() for result in results],
+    }
+    text = json.dumps(document, indent=2)
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+
+
+def read(path: str) -> list:
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"'{path}' has an unsupported format.")
+    return [Result(**result) for result in document["results"]]
+
+
+def compare(results: list, baseline: list, threshold: float, out=sys.stdout) -> list:
+    """
+    Prints the ratio of every result to the baseline, and returns the
+    times that got slower by more than `threshold` (e.g. 0.1 is 10%).
+    """
+    previous = {result.key: result for result in baseline}
+    regressions = []
+    ratios = []
+    print(f"\n{'scenario':>10} {'case':<32} {'metric':<14} {'ratio':>8}", file=out)
+    for result in results:
+        before = previous.get(result.key)
+        if before is None or before.unit != result.unit or not before.value:
+            continue
+        ratio = result.value / before.value
+        mark = ""
+        if result.unit in TIME_UNITS:
+            ratios.append(ratio)
+            if ratio > 1 + threshold:
+                regressions.append(result)
+                mark = "  slower"
+            elif ratio < 1 - threshold:
+                mark = "  faster"
+        print(
+            f"{result.scenario:>10} {result.case:<32} {result.metric:<14} "
+            f"{ratio:>7.2f}x{mark}",
+            file=out,
+        )
+    if ratios:
+        mean = math.exp(sum(map(math.log, ratios)) / len(ratios))
+        print(f"geometric mean of times: {mean:.3f}x", file=out)
+    return regressions
@@ -0,0 +1,80 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cost of `go_catch` as the number of layered sources grows.
+
+Compares validating every layer as a full `Settings` (the previous
+behaviour of `go_catch`) with merging the raw layers and validating
+once, and times a complete `go_catch` of the layers.
+"""
+
+import confdoggo
+from confdoggo.core import _fetch_one, _validate
+
+from . import fixtures
+from .harness import scenario
+
+
+class Section(confdoggo.Settings):
+    host: str = "localhost"
+    port: int = 8080
+    timeout: float = 1.0
+    tags: list = []
+
+
+class BenchSettings(confdoggo.Settings):
+    name: str = "bench"
+    debug: bool = False
+    server: Section = Section()
+    client: Section = Section()
+    database: Section = Section()
+
+
+def make_layer(index):
+    return {
+        "name": f"layer-{index}",
+        "server": {"port": 8000 + index, "tags": [str(i) for i in range(10)]},
+        "client": {"timeout": index / 10},
+        "database": {"host": f"db-{index}"},
+    }
+
+
+@scenario("layers")
+def layers(bench):
+    counts = bench.sizes([1, 2, 5, 10, 20], [1, 5])
+    with fixtures.directory() as directory:
+        paths = [
+            fixtures.write_json(directory / f"layer-{index}.json", make_layer(index))
+            for index in range(max(counts))
+        ]
+        configurations = [_fetch_one("file://" + path) for path in paths]
+        for count in counts:
+            layers = configurations[:count]
+
+            def per_layer():
+                for config in layers:
+                    BenchSettings.parse_obj(config.parsed_content)
+
+            def merged():
+                _validate(BenchSettings, layers)
+
+            bench.time(f"{count} layers", per_layer, metric="per-layer")
+            bench.time(f"{count} layers", merged, metric="merged")
+            bench.time(
+                f"{count} layers",
+                lambda: fixtures.go_catch_uncached(BenchSettings, paths[:count]),
+                metric="go_catch",
+            )
@@ -0,0 +1,117 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Time of a complete `go_catch` (fetch, parse, merge and validation) as the
+size and the nesting depth of the document grow, from files, from
+snapshots, from environment variables and from a local HTTP server, with
+and without a source cache.
+"""
+
+import os
+import time
+
+import confdoggo
+from confdoggo.cache import SourceCache
+
+from . import fixtures
+from .harness import scenario
+
+
+def backdate(path: str):
+    # recently modified files are not trusted by fingerprints (and so
+    # by snapshots): see clients.fs.RACY_INTERVAL.
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+
+@scenario("load")
+def load(bench):
+    with fixtures.directory() as directory:
+        for flags in bench.sizes([10, 1000, 10000], [10, 1000]):
+            path = fixtures.write_json(
+                directory / f"flags-{flags}.json", fixtures.make_flags(flags)
+            )
+            backdate(path)
+            snapshots = str(directory / "snapshots")
+            bench.time(
+                f"{flags} flags",
+                lambda: fixtures.go_catch_uncached(fixtures.Flags, [path]),
+                metric="file",
+            )
+            # the source is shared with the roots that already loaded it
+            bench.time(
+                f"{flags} flags",
+                lambda: confdoggo.go_catch(fixtures.Flags, [path]),
+                metric="cached",
+            )
+            bench.time(
+                f"{flags} flags",
+                lambda: confdoggo.go_catch(
+                    fixtures.Flags, [path], snapshot_dir=snapshots
+                ),
+                metric="snapshot",
+            )
+
+        for depth in bench.sizes([1, 4, 16, 64], [1, 16]):
+            model = fixtures.nested_settings(depth)
+            path = fixtures.write_json(
+                directory / f"nested-{depth}.json", fixtures.make_nested(depth)
+            )
+            bench.time(
+                f"depth {depth}",
+                lambda: fixtures.go_catch_uncached(model, [path]),
+                metric="file",
+            )
+
+        for depth in bench.sizes([1, 16, 64], [16]):
+            # one variable per level of nesting, among the whole environment
+            model = fixtures.nested_settings(depth)
+            prefix = f"CONFDOGGO_BENCH_{depth}_"
+            variables = {
+                prefix + "__".join(["CHILD"] * level + ["VALUE"]): str(level)
+                for level in range(depth + 1)
+            }
+            os.environ.update(variables)
+            try:
+                bench.time(
+                    f"depth {depth}",
+                    lambda: fixtures.go_catch_uncached(model, ["env://" + prefix]),
+                    metric="env",
+                )
+            finally:
+                for name in variables:
+                    del os.environ[name]
+
+        with fixtures.http_server(directory) as url:
+            for flags in bench.sizes([10, 1000, 10000], [10, 1000]):
+                source = f"{url}/flags-{flags}.json"
+                bench.time(
+                    f"{flags} flags",
+                    lambda: fixtures.go_catch_uncached(fixtures.Flags, [source]),
+                    metric="http",
+                )
+                # served from memory, once revalidated in the background
+                cache = SourceCache(max_age=60)
+                try:
+                    bench.time(
+                        f"{flags} flags",
+                        lambda: fixtures.go_catch_uncached(
+                            fixtures.Flags, [source], source_cache=cache
+                        ),
+                        metric="http cached",
+                    )
+                finally:
+                    cache.shutdown()
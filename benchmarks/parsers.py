@@ -0,0 +1,71 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Parsing time of the JSON and YAML frontends for every available backend,
+on a large feature-flags-like document, from str and from bytes.
+"""
+
+import json
+
+from confdoggo.utils import Configuration, MissingLibraryException
+from confdoggo.frontends import json as json_frontend
+
+from . import fixtures
+from .harness import scenario
+
+
+def available_frontends():
+    frontends = {}
+    for name in json_frontend.backends:
+        try:
+            frontends[("json", name)] = json_frontend.JsonFrontend(name)
+        except MissingLibraryException:
+            pass
+    try:
+        from confdoggo.frontends import yaml as yaml_frontend
+    except MissingLibraryException:
+        return frontends
+    for name in yaml_frontend.backends:
+        try:
+            frontends[("yaml", name)] = yaml_frontend.YamlFrontend(name)
+        except MissingLibraryException:
+            pass
+    return frontends
+
+
+def dump(kind, document) -> str:
+    if kind == "json":
+        return json.dumps(document)
+    import yaml
+
+    return yaml.dump(document, Dumper=getattr(yaml, "CDumper", yaml.Dumper))
+
+
+@scenario("parsers")
+def parsers(bench):
+    flags = bench.sizes(5000, 500)
+    document = fixtures.make_flags(flags)
+    sources = {}
+    for (kind, name), frontend in available_frontends().items():
+        if kind not in sources:
+            sources[kind] = dump(kind, document)
+        for content in (sources[kind], sources[kind].encode("utf-8")):
+            config = Configuration(content=content)
+            bench.time(
+                f"{kind} {name} {flags} flags",
+                lambda: frontend.parse(config),
+                metric=type(content).__name__,
+            )
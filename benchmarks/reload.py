@@ -0,0 +1,152 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cost of keeping settings up to date: registering watchers on many files,
+polling them, reloading a changed or unchanged source (or a fragment of a
+conf.d directory), bursts of changes coalesced by the debounce window, and
+`Settings.update`.
+"""
+
+import itertools
+import threading
+import time
+from pathlib import Path
+
+import confdoggo
+from confdoggo import core
+from confdoggo.watchers.fs import FileSystemPollHub
+
+from . import fixtures
+from .harness import scenario
+from .load import backdate
+
+
+@scenario("reload")
+def reload(bench):
+    with fixtures.directory() as directory:
+        for files in bench.sizes([1, 10, 100], [1, 10]):
+            paths = [
+                fixtures.write_json(directory / f"layer-{i}.json", {"value": i})
+                for i in range(files)
+            ]
+            for path in paths:
+                backdate(path)
+            model = fixtures.nested_settings(0)
+            case = f"{files} files"
+
+            def watch():
+                confdoggo.go_catch(model, paths, watch=True)
+                confdoggo.shutdown_watchers()
+
+            bench.time_once(case, watch, metric="watch")
+
+            # a pass of the polling hub, used when watchdog is missing
+            hub = FileSystemPollHub()
+            names = [Path(path).name for path in paths]
+            bench.time(case, lambda: hub.sweep(str(directory), names), metric="poll")
+
+            confdoggo.go_catch(model, paths)
+            manager = core.roots_registry[model]
+            urls = list(manager.configurations)
+            bench.time(case, lambda: manager.reload(urls), metric="unchanged")
+
+            values = itertools.count()
+
+            def changed():
+                document = {"value": next(values)}
+                fixtures.write_json(directory / "layer-0.json", document)
+                manager.reload(urls[:1])
+
+            bench.time(case, changed, metric="changed")
+
+        for fragments in bench.sizes([10, 100], [10]):
+            conf_d = directory / f"conf.d-{fragments}"
+            conf_d.mkdir()
+            for i in range(fragments):
+                flags = fixtures.make_flags(10)["flags"]
+                document = {"flags": {f"{i}-{name}": f for name, f in flags.items()}}
+                backdate(fixtures.write_json(conf_d / f"{i:03}.json", document))
+            case = f"conf.d {fragments} files"
+            bench.time(
+                case,
+                lambda: fixtures.go_catch_uncached(fixtures.Flags, [conf_d]),
+                metric="load",
+            )
+            manager = core.roots_registry[fixtures.Flags]
+            urls = list(manager.configurations)
+            bench.time(case, lambda: manager.reload(urls), metric="unchanged")
+            values = itertools.count()
+
+            def fragment_changed():
+                document = {"flags": {"0-flag-0": {"rollout": next(values)}}}
+                fixtures.write_json(conf_d / "000.json", document)
+                manager.reload(urls)
+
+            # only the changed fragment is parsed again
+            bench.time(case, fragment_changed, metric="changed")
+
+        if fixtures.has_os_watcher():
+            for rate in bench.sizes([10, 100, 1000], [100]):
+                burst(bench, directory, rate, duration=0.25 if bench.quick else 1)
+        else:
+            bench.skip("bursts of changes need watchdog")
+
+    for depth in bench.sizes([1, 16], [16]):
+        settings = fixtures.nested_settings(depth)()
+        documents = itertools.cycle(
+            [fixtures.make_nested(depth, 1), fixtures.make_nested(depth, 2)]
+        )
+        same = fixtures.make_nested(depth, 3)
+        settings.update(same)
+        case = f"update depth {depth}"
+        bench.time(case, lambda: settings.update(same), metric="unchanged")
+        bench.time(case, lambda: settings.update(next(documents)), metric="changed")
+
+
+def burst(bench, directory, rate, duration):
+    """
+    Changes a watched file `rate` times a second for `duration` seconds,
+    then records how many reloads were made and how long it took after
+    the last change for the settings to be up to date.
+    """
+    model = fixtures.nested_settings(0)
+    path = fixtures.write_json(directory / "burst.json", {"value": -1})
+    confdoggo.go_catch(model, [path], watch=True, debounce=0.05)
+    manager = core.roots_registry[model]
+    applied = threading.Event()
+    reloads = []
+
+    def changed(changes):
+        reloads.append(changes)
+        if manager.root_settings.value == last:
+            applied.set()
+
+    manager.subscribe("value", changed)
+    count = max(1, int(rate * duration))
+    last = count - 1
+    try:
+        for value in range(count):
+            fixtures.write_json(directory / "burst.json", {"value": value})
+            time.sleep(1 / rate)
+        written = time.perf_counter()
+        applied.wait(10)
+        settle = (time.perf_counter() - written) * 1e3
+    finally:
+        confdoggo.shutdown_watchers()
+    case = f"{rate} changes/s"
+    bench.record(case, "changes", count, "writes")
+    bench.record(case, "reloads", len(reloads), "reloads")
+    bench.record(case, "settle", settle, "ms")
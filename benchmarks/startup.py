@@ -0,0 +1,83 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Startup cost: time spent importing confdoggo modules, as reported by
+`python -X importtime`, and number of modules loaded, in fresh
+interpreters importing confdoggo, using its names and loading settings.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from . import fixtures
+from .harness import scenario
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COUNT_MODULES = """
+import sys
+_before = len(sys.modules)
+{code}
+print(len(sys.modules) - _before)
+"""
+
+
+def run(code: str, *options) -> subprocess.CompletedProcess:
+    environment = dict(os.environ, PYTHONPATH=str(ROOT))
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_time(code: str) -> float:
+    """ Microseconds spent importing confdoggo modules by `code`. """
+    total = 0
+    for line in run(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # modules imported directly by `code`, rather than by other modules
+        if name.startswith(" confdoggo"):
+            total += int(cumulative)
+    return total
+
+
+@scenario("startup")
+def startup(bench):
+    with fixtures.directory() as directory:
+        path = fixtures.write_json(directory / "settings.json", {"value": 1})
+        cases = {
+            "import": "import confdoggo",
+            "version": "import confdoggo; confdoggo.__version__",
+            "first use": "import confdoggo; confdoggo.Settings",
+            "go_catch": (
+                "import confdoggo\n"
+                "class Settings(confdoggo.Settings):\n"
+                "    value: int = 0\n"
+                f"confdoggo.go_catch(Settings, [{path!r}])"
+            ),
+        }
+        for case, code in cases.items():
+            times = [import_time(code) for _ in range(bench.repeat)]
+            bench.record(case, "import time", min(times) / 1e3, "ms")
+            modules = int(run(COUNT_MODULES.format(code=code)).stdout)
+            bench.record(case, "modules", modules, "modules")
@@ -13,14 +13,44 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .core import *
 from .__version__ import *
-import mimetypes
-
-# add YAML to mimetypes database.
-# necessary because yaml does not yet have
-# an official mime type.
-mimetypes.add_type("application/x-yaml", ".yaml")
-mimetypes.add_type("application/x-yaml", ".yml")
-mimetypes.add_type("application/confdoggo", ".doggo")
-del mimetypes
+from .__version__ import __all__ as _version_names
+
+# the names of `core` are imported on first use: pydantic and the rest
+# of `core` dominate the startup time of short-lived programs.
+_core_names = [
+    "Settings",
+    "SettingsHandle",
+    "shutdown_watchers",
+    "subscribe",
+    "unsubscribe",
+    "Change",
+    "NoConfigurationsException",
+    "ParseException",
+    "go_catch",
+    "go_catch_async",
+]
+
+
+def __getattr__(name):
+    if name in _core_names:
+        from . import core
+
+        value = globals()[name] = getattr(core, name)
+        return value
+    if not name.startswith("_"):
+        # submodules as well (e.g. confdoggo.cache), imported on first use
+        import importlib
+        import importlib.util
+
+        module_name = f"{__name__}.{name}"
+        if importlib.util.find_spec(module_name) is not None:
+            return importlib.import_module(module_name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_core_names))
+
+
+__all__ = _core_names + _version_names
@@ -0,0 +1,264 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Stale-while-revalidate cache of remote sources.
+
+The last good version of each remote source is kept in memory and,
+optionally, in a cache directory. Loading a source serves that version
+right away, and fetches the source again in the background: roots are
+reloaded if it changed. Versions older than their max-stale age are
+only served when fetching the source fails or takes longer than the
+refresh deadline.
+
+Cache files are pickles: the cache directory must only be writable by
+trusted users.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from . import clients, core
+from .utils import Configuration
+
+CACHE_FORMAT = 1
+
+logger = logging.getLogger(__name__)
+
+
+class Entry(NamedTuple):
+    config: Configuration
+    # time.time() of the last successful fetch
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class SourceCache:
+    """
+    Pass to `go_catch(..., source_cache=...)`.
+
+    Versions are served without waiting for at most `max_stale` seconds
+    after they were last fetched (or as given by `max_stale_by_url`).
+    Past that age, loading waits up to `deadline` seconds for the source
+    before serving the stale version. Versions younger than `max_age`
+    seconds are not fetched again. At most `max_workers` sources are
+    fetched at once in the background.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = None,
+        max_stale: float = 24 * 3600,
+        deadline: float = 2,
+        max_workers: int = 4,
+        max_stale_by_url: dict = None,
+        max_age: float = 0,
+    ):
+        self.directory = Path(directory).expanduser() if directory else None
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self.max_stale_by_url = dict(max_stale_by_url or {})
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.entries: dict[str, Entry] = {}
+        # url -> refresh in progress, so that a source is fetched once
+        self.refreshing: dict[str, concurrent.futures.Future] = {}
+        # started on the first refresh
+        self.executor = None
+
+    def applies(self, url: str) -> bool:
+        client_type, _ = url.split("://")
+        client = clients.get_client(client_type)
+        return client.remote and not client.depends_on_settings
+
+    def load(self, url: str, settings_class) -> Configuration:
+        if not self.applies(url):
+            return core.sources.load(url, settings_class)
+        entry = self.entry(url)
+        if entry is not None and entry.age < self.max_age:
+            return entry.config
+        refresh = self.refresh_later(url, settings_class)
+        if entry is not None and entry.age <= self.max_stale_for(url):
+            return entry.config
+        try:
+            # with nothing to serve, there is no deadline
+            return refresh.result(None if entry is None else self.deadline)
+        except concurrent.futures.TimeoutError:
+            logger.warning(
+                "Fetching '%s' takes too long, using a version from %.0f s ago.",
+                url,
+                entry.age,
+            )
+        except Exception:
+            # reported by `refresh`
+            if entry is None:
+                raise
+            logger.warning(
+                "Could not fetch '%s', using a version from %.0f s ago.",
+                url,
+                entry.age,
+            )
+        return entry.config
+
+    def max_stale_for(self, url: str) -> float:
+        return self.max_stale_by_url.get(url, self.max_stale)
+
+    def entry(self, url: str) -> Optional[Entry]:
+        with self.lock:
+            entry = self.entries.get(url)
+        if entry is None and self.directory is not None:
+            entry = self.read(url)
+            if entry is not None:
+                with self.lock:
+                    entry = self.entries.setdefault(url, entry)
+        return entry
+
+    def refresh_later(self, url: str, settings_class) -> concurrent.futures.Future:
+        with self.lock:
+            refresh = self.refreshing.get(url)
+            if refresh is None:
+                if self.executor is None:
+                    self.executor = concurrent.futures.ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="confdoggo-refresh"
+                    )
+                refresh = self.refreshing[url] = self.executor.submit(
+                    self.refresh, url, settings_class
+                )
+        return refresh
+
+    def refresh(self, url: str, settings_class) -> Configuration:
+        try:
+            entry = self.entry(url)
+            # conditional requests are made with the cached version
+            previous = entry.config if entry is not None else None
+            config, _ = core.sources.refresh(url, settings_class, previous)
+            self.store(url, config, changed=config is not previous)
+        except Exception:
+            # nobody may be waiting for the refresh
+            logger.warning("Could not refresh '%s'.", url, exc_info=True)
+            raise
+        finally:
+            with self.lock:
+                self.refreshing.pop(url, None)
+        for manager in list(core.roots_registry.values()):
+            self.update(manager, url, config)
+        return config
+
+    def catch_up(self, manager: core.RootSettingsManager):
+        """ Reload the sources of `manager` refreshed since it loaded them. """
+        for url in manager.configurations:
+            with self.lock:
+                entry = self.entries.get(url)
+            if entry is not None:
+                self.update(manager, url, entry.config)
+
+    @staticmethod
+    def update(manager: core.RootSettingsManager, url: str, config: Configuration):
+        current = manager.configurations.get(url)
+        if current is None or current is config:
+            return
+        try:
+            manager.refreshed(url, config)
+        except Exception:
+            logger.exception("Error while reloading %s.", manager.settings_name)
+
+    def store(self, url: str, config: Configuration, changed: bool):
+        entry = Entry(config, time.time())
+        with self.lock:
+            self.entries[url] = entry
+        if self.directory is None:
+            return
+        try:
+            if changed or not self.path(url).exists():
+                self.write(url, entry)
+            else:
+                # revalidated: only its age changes
+                os.utime(self.path(url), (entry.fetched_at, entry.fetched_at))
+        except OSError:
+            logger.warning("Could not write the cache of '%s'.", url, exc_info=True)
+
+    def path(self, url: str) -> Path:
+        name = hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+        return self.directory / f"{name}.source"
+
+    def write(self, url: str, entry: Entry):
+        config = entry.config
+        data = {
+            "format": CACHE_FORMAT,
+            "url": url,
+            "mime_type": config.mime_type,
+            "parsed_content": config.parsed_content,
+            "digest": config.digest,
+            "fingerprint": config.fingerprint,
+            "etag": config.etag,
+            "last_modified": config.last_modified,
+        }
+        path = self.path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # written aside and renamed, so that readers never see a partial file
+        fd, temporary = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.utime(temporary, (entry.fetched_at, entry.fetched_at))
+            os.replace(temporary, str(path))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def read(self, url: str) -> Optional[Entry]:
+        path = self.path(url)
+        try:
+            with open(path, "rb") as f:
+                fetched_at = os.fstat(f.fileno()).st_mtime
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("format") != CACHE_FORMAT
+            or data.get("url") != url
+        ):
+            return None
+        config = Configuration(
+            url=url,
+            mime_type=data["mime_type"],
+            parsed_content=data["parsed_content"],
+            digest=data["digest"],
+            fingerprint=data["fingerprint"],
+            etag=data["etag"],
+            last_modified=data["last_modified"],
+        )
+        return Entry(config, fetched_at)
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait)
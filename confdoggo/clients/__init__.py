@@ -14,14 +14,68 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import abc
+import functools
+import mimetypes
+from typing import Optional
+from ..registry import Registry
 from ..utils import DoggoException, Configuration
 
 
 class BaseClient(abc.ABC):
+    # whether the content of a source depends on the settings class it
+    # is loaded for (see Configuration.settings_class): such sources are
+    # not shared by the roots including them.
+    depends_on_settings = False
+    # whether fetching may be slow or fail for reasons other than the
+    # source itself (e.g. the network): see cache.SourceCache
+    remote = False
+
     @abc.abstractmethod
     def go_catch(self, config: Configuration, url: str) -> None:
         pass
 
+    def fingerprint(self, url: str) -> Optional[tuple]:
+        """
+        Cheap metadata about the source at `url`: when it equals the
+        `fingerprint` recorded by `go_catch`, the source is unchanged.
+        None means that there is no such shortcut.
+        """
+        return None
+
+    def expand(self, url: str) -> Optional[list]:
+        """
+        The URLs (without protocol) of the fragments making up the source
+        at `url`, in increasing order of importance, when `url` designates
+        several documents (e.g. a directory). None for single documents.
+        """
+        return None
+
+
+class BaseAsyncClient(abc.ABC):
+    @abc.abstractmethod
+    async def go_catch(self, config: Configuration, url: str) -> None:
+        pass
+
+    def expand(self, url: str) -> Optional[list]:
+        # see BaseClient.expand
+        return None
+
+
+class ThreadedAsyncClient(BaseAsyncClient):
+    """ Runs a blocking client in the event loop's default executor. """
+
+    def __init__(self, client: BaseClient):
+        self.client = client
+
+    async def go_catch(self, config: Configuration, url: str) -> None:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.client.go_catch, config, url)
+
+    def expand(self, url: str) -> Optional[list]:
+        return self.client.expand(url)
+
 
 class UnknownClient(DoggoException):
     def __init__(self, client_name):
@@ -35,18 +89,76 @@ def fs_client():
     return fs.FileSystemClient()
 
 
-clients_registry = {
-    "file": fs_client,
-    # TODO
-    # 'http': ['http', 'HttpClient'],
-    # 'https': ['https', 'HttpsClient'],
-    # 'ssh': ['ssh', 'SshClient'],
-    # 'ftp': ['ftp', 'FtpClient'],
-}
+def http_client():
+    from . import http
+
+    return http.HttpClient("http")
+
+
+def https_client():
+    from . import http
+
+    return http.HttpClient("https")
+
+
+def env_client():
+    from . import env
+
+    return env.EnvironmentClient()
+
+
+def argv_client():
+    from . import env
+
+    return env.ArgvClient()
+
+
+clients_registry = Registry(
+    "confdoggo.clients",
+    {
+        "file": fs_client,
+        "http": http_client,
+        "https": https_client,
+        "env": env_client,
+        "argv": argv_client,
+        # TODO
+        # 'ssh': ['ssh', 'SshClient'],
+        # 'ftp': ['ftp', 'FtpClient'],
+    },
+)
 
 
 def get_client(client_type: str):
     try:
-        return clients_registry[client_type]()
+        return clients_registry.instance(client_type)
     except KeyError:
         raise UnknownClient(client_type)
+
+
+# protocols with a native asynchronous client.
+# the others are served by their blocking client through a thread pool.
+async_clients_registry = Registry("confdoggo.async_clients")
+
+
+def get_async_client(client_type: str):
+    return async_clients_registry.instance(
+        client_type, lambda: ThreadedAsyncClient(get_client(client_type))
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def guess_mime_type(path: str) -> Optional[str]:
+    # sources are fetched again and again on reloads
+    _add_mime_types()
+    mime_type, _ = mimetypes.guess_type(path)
+    return mime_type
+
+
+@functools.lru_cache(maxsize=None)
+def _add_mime_types():
+    # done on first use rather than on import, since
+    # it reads the mimetypes database of the system.
+    # yaml does not have an official mime type yet.
+    mimetypes.add_type("application/x-yaml", ".yaml")
+    mimetypes.add_type("application/x-yaml", ".yml")
+    mimetypes.add_type("application/confdoggo", ".doggo")
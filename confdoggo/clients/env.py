@@ -0,0 +1,130 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Sources overriding the fields of the settings they are loaded for:
+environment variables (env://PREFIX) and command line options
+(argv://, or argv://PREFIX). See the fieldmap module for their names.
+"""
+
+import os
+import sys
+from typing import List
+from . import BaseClient
+from ..fieldmap import field_map, nest, option_key
+from ..utils import Configuration, DoggoException, content_digest
+
+
+class UnboundSource(DoggoException):
+    def __init__(self, url):
+        self.url = url
+        super().__init__(f"'{self.url}' can only be loaded for a settings class.")
+
+
+class EnvironmentClient(BaseClient):
+    """ env://APP_ reads APP_SERVER__PORT into server.port. """
+
+    depends_on_settings = True
+
+    def go_catch(self, config: Configuration, url: str):
+        if config.settings_class is None:
+            raise UnboundSource(config.url)
+        fields = field_map(config.settings_class)
+        variables = self.variables(url)
+        assignments = []
+        for name, value in variables:
+            target = fields.variables.get(name[len(url) :].upper())
+            if target is not None:
+                assignments.append((target.path, fields.decode(target, value)))
+        config.parsed_content = nest(assignments)
+        config.digest = self.digest(variables)
+        config.fingerprint = (config.digest,)
+
+    def fingerprint(self, url):
+        # a digest rather than the variables, which may be secrets
+        return (self.digest(self.variables(url)),)
+
+    @staticmethod
+    def variables(prefix: str) -> List[tuple]:
+        return sorted(
+            (name, value)
+            for name, value in os.environ.items()
+            if name.startswith(prefix)
+        )
+
+    @staticmethod
+    def digest(variables: List[tuple]) -> str:
+        return content_digest(repr(variables))
+
+
+class ArgvClient(BaseClient):
+    """
+    argv:// reads --server.port=8080 (or --server.port 8080) into
+    server.port. Boolean fields may be set by --option alone. Other
+    arguments are ignored, as are the ones after '--'.
+
+    argv://app reads --app.server.port instead, for the options of
+    several settings classes sharing a command line.
+    """
+
+    depends_on_settings = True
+
+    def __init__(self, arguments: List[str] = None):
+        # the arguments of the process by default
+        self.arguments = arguments
+
+    def go_catch(self, config: Configuration, url: str):
+        if config.settings_class is None:
+            raise UnboundSource(config.url)
+        fields = field_map(config.settings_class)
+        arguments = self.current_arguments()
+        prefix = f"--{url}." if url else "--"
+        assignments = []
+        i = 0
+        while i < len(arguments):
+            argument = arguments[i]
+            i += 1
+            if argument == "--":
+                break
+            if not argument.startswith(prefix):
+                continue
+            name, equals, value = argument[len(prefix) :].partition("=")
+            target = fields.options.get(option_key(name))
+            if target is None:
+                continue
+            if not equals:
+                if target.flag:
+                    value = "true"
+                elif i < len(arguments):
+                    value = arguments[i]
+                    i += 1
+                else:
+                    continue
+            assignments.append((target.path, fields.decode(target, value)))
+        config.parsed_content = nest(assignments)
+        config.digest = self.digest(arguments)
+        config.fingerprint = (config.digest,)
+
+    def fingerprint(self, url):
+        return (self.digest(self.current_arguments()),)
+
+    def current_arguments(self) -> List[str]:
+        if self.arguments is not None:
+            return self.arguments
+        return sys.argv[1:]
+
+    @staticmethod
+    def digest(arguments: List[str]) -> str:
+        return content_digest("\0".join(arguments))
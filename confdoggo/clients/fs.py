@@ -13,13 +13,110 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import mimetypes
-from . import BaseClient
+import fnmatch
+import glob
+import os
+import re
+import stat
+import time
+from . import BaseClient, guess_mime_type
+
+
+# a file modified within this many nanoseconds from when it was read
+# may be modified again without its modification time changing.
+RACY_INTERVAL = 2_000_000_000
 
 
 class FileSystemClient(BaseClient):
     def go_catch(self, config, url):
-        with open(url, "r") as f:
-            contents = f.read()
-        config.content = contents
-        config.mime_type, _ = mimetypes.guess_type(url)
+        # bytes are left to the frontends to decode. Files are read
+        # rather than memory-mapped: a mapping of a file truncated while
+        # being parsed would crash the process (SIGBUS).
+        with open(url, "rb") as f:
+            status = os.fstat(f.fileno())
+            config.content = f.read()
+        config.mime_type = guess_mime_type(url)
+        if time.time_ns() - status.st_mtime_ns > RACY_INTERVAL:
+            config.fingerprint = self.stat_fingerprint(status)
+
+    def fingerprint(self, url):
+        try:
+            status = os.stat(url)
+        except OSError:
+            status = None
+        if status is not None and not stat.S_ISDIR(status.st_mode):
+            return self.stat_fingerprint(status)
+        fragments = self.expand(url)
+        if fragments is not None:
+            # adding or removing a fragment changes it as well
+            return tuple((path, self.fingerprint(path)) for path in fragments)
+        return None
+
+    @staticmethod
+    def stat_fingerprint(status):
+        return status.st_mtime_ns, status.st_size, status.st_ino
+
+    def expand(self, url):
+        """
+        Directories expand to the files they contain in a known format,
+        and glob patterns to the files they match, both in lexicographic
+        order: conf.d-style fragments are meant to be named accordingly
+        (e.g. 10-defaults.yaml, 50-site.yaml).
+        """
+        if os.path.isfile(url):
+            # even if its name looks like a pattern
+            return None
+        if has_magic(url):
+            return sorted(
+                path for path in glob.glob(url, recursive=True) if os.path.isfile(path)
+            )
+        if not os.path.isdir(url):
+            return None
+        from ..frontends import frontends_registry
+
+        fragments = []
+        with os.scandir(url) as entries:
+            for entry in entries:
+                if (
+                    not entry.name.startswith(".")
+                    and entry.is_file()
+                    and frontends_registry.provides(guess_mime_type(entry.name))
+                ):
+                    fragments.append(entry.path)
+        return sorted(fragments)
+
+
+_magic = re.compile(r"[*?[]")
+
+
+def has_magic(path: str) -> bool:
+    return _magic.search(path) is not None
+
+
+def is_collection(path: str) -> bool:
+    """ Whether `path` designates several files, see `expand`. """
+    if os.path.isfile(path):
+        return False
+    return has_magic(path) or os.path.isdir(path)
+
+
+def collection_root(path: str) -> tuple:
+    """
+    The directory to watch for changes of the files in the collection
+    `path`, and whether its subdirectories must be watched as well.
+    """
+    if not has_magic(path):
+        return path, False
+    parts = path.split(os.sep)
+    magic = next(i for i, part in enumerate(parts) if has_magic(part))
+    return os.sep.join(parts[:magic]) or os.sep, magic < len(parts) - 1
+
+
+def collection_matcher(path: str):
+    """ Tells whether a file belongs to the collection `path`. """
+    if not has_magic(path):
+        return lambda other: (
+            os.path.dirname(other) == path
+            and not os.path.basename(other).startswith(".")
+        )
+    return lambda other: fnmatch.fnmatchcase(other, path)
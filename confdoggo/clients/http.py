@@ -0,0 +1,153 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import http.client
+import threading
+from . import BaseClient, guess_mime_type
+from ..utils import Configuration, DoggoException
+
+
+class HttpException(DoggoException):
+    def __init__(self, url, status, reason):
+        self.url = url
+        self.status = status
+        super().__init__(f"fetching '{url}' failed with {status} {reason}.")
+
+
+class ConnectionPool:
+    """ Keep-alive connections, reused for requests to the same host. """
+
+    def __init__(self, max_idle=4, timeout=10):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # (scheme, host) -> idle connections
+        self.idle = {}
+
+    def acquire(self, scheme: str, host: str) -> http.client.HTTPConnection:
+        with self.lock:
+            connections = self.idle.get((scheme, host))
+            if connections:
+                return connections.pop()
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, timeout=self.timeout)
+        return http.client.HTTPConnection(host, timeout=self.timeout)
+
+    def release(self, scheme: str, host: str, connection: http.client.HTTPConnection):
+        with self.lock:
+            connections = self.idle.setdefault((scheme, host), [])
+            if len(connections) < self.max_idle:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def request(
+        self,
+        scheme: str,
+        host: str,
+        method: str,
+        path: str,
+        headers: dict,
+        timeout: float = None,
+    ):
+        """ Returns the response and its body, which is read entirely. """
+        for attempt in range(2):
+            connection = self.acquire(scheme, host)
+            reused = connection.sock is not None
+            try:
+                if timeout is not None:
+                    self.set_timeout(connection, timeout)
+                connection.request(method, path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                if timeout is not None:
+                    self.set_timeout(connection, self.timeout)
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                if reused and not attempt:
+                    # the server closed an idle connection: try a new one
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.release(scheme, host, connection)
+            return response, body
+
+    @staticmethod
+    def set_timeout(connection: http.client.HTTPConnection, timeout: float):
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+
+    def clear(self):
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+# shared by every http and https client in the process
+pool = ConnectionPool()
+
+
+class HttpClient(BaseClient):
+    remote = True
+
+    def __init__(self, scheme="http", connection_pool: ConnectionPool = None):
+        self.scheme = scheme
+        self.pool = connection_pool or pool
+
+    def go_catch(self, config: Configuration, url: str):
+        host, _, path = url.partition("/")
+        path = "/" + path
+        headers = {"Accept-Encoding": "identity"}
+        if config.etag:
+            headers["If-None-Match"] = config.etag
+        if config.last_modified:
+            headers["If-Modified-Since"] = config.last_modified
+        response, body = self.pool.request(self.scheme, host, "GET", path, headers)
+        if response.status == 304:
+            config.not_modified = True
+            return
+        if response.status != 200:
+            raise HttpException(
+                f"{self.scheme}://{url}", response.status, response.reason
+            )
+        self.read(config, response, body, path)
+
+    @classmethod
+    def read(cls, config: Configuration, response, body: bytes, path: str):
+        """ Fill `config` from a successful response to a GET of `path`. """
+        config.etag = response.getheader("ETag")
+        config.last_modified = response.getheader("Last-Modified")
+        config.mime_type = cls.mime_type(response, path)
+        config.content = body.decode(response.headers.get_content_charset("utf-8"))
+
+    @staticmethod
+    def mime_type(response, path: str) -> str:
+        from ..frontends import frontends_registry
+
+        mime_type = None
+        if "Content-Type" in response.headers:
+            mime_type = response.headers.get_content_type()
+            if frontends_registry.provides(mime_type):
+                return mime_type
+        # none, or one without a frontend (e.g. text/plain)
+        return guess_mime_type(path.split("?")[0]) or mime_type
@@ -16,23 +16,135 @@
 from __future__ import annotations
 
 
-from .utils import Configuration, DoggoException
-from . import clients, frontends, watchers
+from .utils import Configuration, DoggoException, content_digest
+from .diff import MISSING, Change, diff, split_path
+from .index import PathIndex, Writes
+from .merge import merge_configurations
+from . import clients, frontends, instrumentation, lazy, watchers
 import pydantic
-from typing import Iterable, Type, Union
+from typing import Callable, Iterable, Optional, Sequence, Type, Union
 from pathlib import Path
 import functools
 import collections
+import collections.abc
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class Settings(pydantic.BaseModel):
+    # set on root settings, see `get`
+    _index: Optional[PathIndex] = pydantic.PrivateAttr(None)
+    # assignments to the tree of an indexed root, see `index.Writes`
+    _writes: Optional[Writes] = pydantic.PrivateAttr(None)
+    # raw data of the sections not validated yet, see `lazy.parse_lazy`
+    _lazy: Optional[dict] = pydantic.PrivateAttr(None)
+
+    def __getattr__(self, name):
+        # only called for attributes not found otherwise,
+        # such as sections that were not validated yet.
+        if not name.startswith("_") and self._lazy and name in self._lazy:
+            return lazy.materialize(self, name)
+        raise AttributeError(
+            f"'{self.__class__.__name__}' object has no attribute '{name}'"
+        )
+
+    def validate_all(self):
+        """
+        Validate the sections that were left for validation on first
+        access, raising all of their errors at once.
+        """
+        lazy.validate_all(self)
+        return self
+
+    def _iter(self, *args, **kwargs):
+        # exporting (dict(), json(), comparisons) needs every section
+        for name in lazy.pending(self):
+            lazy.materialize(self, name)
+        return super()._iter(*args, **kwargs)
+
+    def __repr_args__(self):
+        args = super().__repr_args__()
+        return args + [(name, NOT_VALIDATED) for name in lazy.pending(self)]
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            writes = self._writes
+            if writes is not None:
+                writes.count += 1
+
+    def get(self, path: str, default=MISSING):
+        """
+        Value at the dotted `path` (e.g. "server.port"), which may go
+        through the keys of mappings (e.g. "flags.beta" for a dict field).
+
+        On root settings, values are looked up in an index of all the
+        paths, kept up to date on reload and rebuilt after assignments to
+        the tree, instead of walking it. Mappings are indexed as a whole:
+        the values in them are found by walking.
+        """
+        index = self._index
+        if index is not None and index.count != index.writes.count:
+            index = self._reindex()
+        if index is not None:
+            try:
+                return index.values[path]
+            except KeyError:
+                # sections and the values in mappings are not indexed
+                pass
+        value = self
+        for key in split_path(path):
+            if isinstance(value, collections.abc.Mapping):
+                value = value.get(key, MISSING)
+            else:
+                value = getattr(value, key, MISSING)
+            if value is MISSING:
+                if default is MISSING:
+                    raise KeyError(path)
+                return default
+        return value
+
+    def get_many(self, paths: Sequence[str]) -> list:
+        index = self._index
+        if index is None:
+            return [self.get(path) for path in paths]
+        if index.count != index.writes.count:
+            index = self._reindex()
+        get = index.values.get
+        values = [get(path, MISSING) for path in paths]
+        for i, value in enumerate(values):
+            if value is MISSING:
+                values[i] = self.get(paths[i])
+        return values
+
+    def iter_prefix(self, prefix: str = ""):
+        """ (dotted path, value) of every value below `prefix`. """
+        index = self._index
+        if index is None:
+            index = PathIndex.build(self)
+        elif index.stale:
+            index = self._reindex()
+        return index.items(prefix)
+
+    def _reindex(self) -> PathIndex:
+        # assigned to since indexed, see `PathIndex.stale`
+        self._index = PathIndex.build(self)
+        return self._index
+
     def update(self, obj: dict):
         def _setter(obj, dictionary):
             for key in dictionary:
-                if isinstance(key, dict):
-                    _setter(getattr(self, dictionary[key]), dictionary[key])
+                current = getattr(obj, key)
+                if isinstance(dictionary[key], dict) and isinstance(
+                    current, pydantic.BaseModel
+                ):
+                    _setter(current, dictionary[key])
                 else:
-                    if getattr(obj, key) != dictionary[key]:
+                    if current != dictionary[key]:
                         # avoid triggering change events
                         # when unnecessary
                         setattr(obj, key, dictionary[key])
@@ -40,55 +152,628 @@ class Settings(pydantic.BaseModel):
         _setter(self, obj)
 
 
+class SettingsHandle:
+    """
+    Reference to the latest settings of a root in copy-on-write mode.
+
+    Reloads never modify the settings returned by `current`: a new
+    instance is built aside and published by replacing the reference,
+    so readers always see a complete configuration without locking.
+    """
+
+    __slots__ = ("settings",)
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+    def current(self) -> Settings:
+        return self.settings
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.settings!r}>"
+
+
+class _NotValidated:
+    def __repr__(self):
+        return "<not validated>"
+
+
+NOT_VALIDATED = _NotValidated()
+
+
+class Source:
+    """ A configuration shared by all the roots including it. """
+
+    __slots__ = (
+        "url",
+        "config",
+        "lock",
+        "fetched_at",
+        "changed_at",
+        "watcher",
+        "callbacks",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.config: Optional[Configuration] = None
+        # serializes fetches, so that concurrent reloads share one
+        self.lock = threading.Lock()
+        # when the last fetch (or check) of `config` started,
+        # and when the watcher last reported a change
+        self.fetched_at = 0.0
+        self.changed_at = 0.0
+        self.watcher = None
+        # of the roots watching the source, replaced rather than modified
+        self.callbacks: list[Callable] = []
+
+
+class SourceTable:
+    """
+    Process-wide table of the sources of all the roots, keyed by URL
+    (and by settings class, for the sources that depend on it).
+
+    A source included by several roots is fetched and parsed once, and
+    watched by a single watcher whose events are fanned out to all of
+    them: the reloads that follow share the fetch of the first one.
+    Parsed contents are never modified, so roots share them as well.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources: dict[tuple, Source] = {}
+
+    def source(self, url: str, settings_class: Type[Settings]) -> Source:
+        client_type, _ = url.split("://")
+        if not clients.get_client(client_type).depends_on_settings:
+            settings_class = None
+        with self.lock:
+            source = self.sources.get((url, settings_class))
+            if source is None:
+                source = self.sources[url, settings_class] = Source(url)
+            return source
+
+    def load(self, url: str, settings_class: Type[Settings]) -> Configuration:
+        """ The configuration at `url`, fetched unless known up to date. """
+        config, _ = self.refresh(url, settings_class)
+        return config
+
+    def refresh(
+        self,
+        url: str,
+        settings_class: Type[Settings],
+        previous: Configuration = None,
+    ) -> tuple[Configuration, Optional[str]]:
+        """
+        The current configuration at `url`, and how it was found up to
+        date: 'shared' (already fetched since the last change seen by
+        its watcher), 'fingerprint', 'not_modified' or 'digest'. None
+        when it was fetched and parsed again.
+
+        `previous` is the version a root has, when the table has none
+        (e.g. loaded from a snapshot).
+        """
+        source = self.source(url, settings_class)
+        with source.lock:
+            current = source.config
+            if current is None:
+                current = source.config = previous
+            if current is not None and source.watcher is not None:
+                if source.fetched_at > source.changed_at:
+                    return current, "shared"
+            started = time.monotonic()
+            if current is not None and current.fingerprint is not None:
+                client_type, client_url = url.split("://")
+                client = clients.get_client(client_type)
+                if client.fingerprint(client_url) == current.fingerprint:
+                    source.fetched_at = started
+                    return current, "fingerprint"
+            config = None
+            if source.watcher is not None:
+                # fetched by the watcher along with the change it reported
+                config = source.watcher.take_fetched()
+            if config is None:
+                config = _fetch_content(url, current, settings_class)
+            if current is not None and config.not_modified:
+                source.fetched_at = started
+                return current, "not_modified"
+            if current is not None and config.digest == current.digest:
+                config.release_content()
+                current.fingerprint = config.fingerprint
+                current.fragments = config.fragments
+                current.etag = config.etag
+                current.last_modified = config.last_modified
+                source.fetched_at = started
+                self.fetched(source, current)
+                return current, "digest"
+            _parse(config)
+            source.config = config
+            source.fetched_at = started
+            self.fetched(source, config)
+            return config, None
+
+    @staticmethod
+    def fetched(source: Source, config: Configuration):
+        # the watcher checks for changes since this version
+        if source.watcher is not None:
+            source.watcher.seed(config)
+
+    def adopt(self, config: Configuration, settings_class: Type[Settings], started):
+        """ Record `config`, fetched outside of the table from `started`. """
+        source = self.source(config.url, settings_class)
+        with source.lock:
+            if source.fetched_at <= started:
+                source.config = config
+                source.fetched_at = started
+
+    def watch(
+        self,
+        url: str,
+        settings_class: Type[Settings],
+        callback: Callable,
+        options: dict = None,
+    ):
+        """
+        `options` are the keyword arguments of the watcher, used when
+        the source is not watched yet.
+        """
+        source = self.source(url, settings_class)
+        with source.lock:
+            source.callbacks = source.callbacks + [callback]
+            if source.watcher is None:
+                watcher_type, _ = url.split("://")
+                watcher_class = watchers.get_watcher(watcher_type)
+                source.watcher = watcher_class(
+                    url, functools.partial(self.changed, source), **(options or {})
+                )
+                if source.config is not None:
+                    source.watcher.seed(source.config)
+                source.watcher.start()
+                # changes made before the watcher started were not seen
+                source.changed_at = time.monotonic()
+
+    def unwatch(self, url: str, settings_class: Type[Settings], callback: Callable):
+        source = self.source(url, settings_class)
+        watcher = None
+        with source.lock:
+            source.callbacks = [
+                other for other in source.callbacks if other is not callback
+            ]
+            if not source.callbacks:
+                watcher, source.watcher = source.watcher, None
+        # stopped without the lock, which the events in flight may need
+        if watcher is not None:
+            watcher.stop()
+
+    def changed(self, source: Source):
+        # called by the watcher: must not wait for fetches in progress
+        source.changed_at = time.monotonic()
+        for callback in source.callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Error while handling a change of '%s'.", source.url)
+
+    def shutdown(self):
+        with self.lock:
+            sources = list(self.sources.values())
+        for source in sources:
+            with source.lock:
+                watcher, source.watcher = source.watcher, None
+                source.callbacks = []
+            if watcher is not None:
+                watcher.stop()
+
+    def clear(self):
+        """ Forget the sources that are not watched. """
+        with self.lock:
+            self.sources = {
+                key: source
+                for key, source in self.sources.items()
+                if source.watcher is not None
+            }
+
+
+sources = SourceTable()
+
+
 class RootSettingsManager:
     def __init__(
         self,
         root_settings: Settings,
         configurations: collections.OrderedDict[str, Configuration],
+        debounce: float = 0,
+        snapshot_dir: Union[str, Path] = None,
+        copy_on_write=False,
+        lazy=False,
+        watch_options: dict = None,
     ):
         self.root_settings = root_settings
         self.configurations = configurations
-
-    def subsequent_configurations(self, config_url: str):
-        found = False
-        for url in self.configurations:
-            if found:
-                yield url
-            if url == config_url:
-                found = True
+        # watcher type -> keyword arguments of its watchers
+        self.watch_options = watch_options or {}
+        # tags the events reported to instruments
+        self.settings_name = root_settings.__class__.__qualname__
+        self.snapshot_dir = snapshot_dir
+        self.copy_on_write = copy_on_write
+        self.lazy = lazy
+        self.handle = SettingsHandle(root_settings)
+        # last merged configurations and validated settings,
+        # as trees of dictionaries
+        self.merged = merge_configurations(configurations.values())
+        if lazy:
+            # the index and the tree would validate every section
+            self.tree = None
+        else:
+            root_settings._index = PathIndex.build(root_settings)
+            self.tree = root_settings.dict()
+        # path -> callbacks, see `subscribe`
+        self.subscribers: dict[tuple, list[Callable]] = {}
+        # watchers may run their callbacks from different threads
+        self.lock = threading.RLock()
+        # changes are collected until no event has been seen for
+        # `debounce` seconds, then they are reloaded all at once.
+        self.debounce = debounce
+        self.pending_changes = threading.Condition()
+        self.pending: dict[str, None] = {}
+        self.deadline = 0
+        # when the first of the pending changes was seen
+        self.first_event = 0
+        self.reloader = None
+        self.closing = False
+        # how reloaded configurations were found to be unchanged:
+        # fingerprint_hits, not_modified_hits, digest_hits,
+        # shared_hits and misses (changed).
+        self.statistics = collections.Counter()
+        # (url, callback) subscribed to the sources table
+        self.watching: list[tuple] = []
 
     def watch_callback(self, configuration_url):
-        try:
-            new, _ = _go_catch_one(self.root_settings.__class__, configuration_url)
-        except pydantic.ValidationError as e:
-            print(
-                f"Ignoring validation errors encountered while updating "
-                f"configuration from '{configuration_url}':\n"
-                f"{str(e)}\n"
-                f"Skipping update."
+        if not self.debounce:
+            start = time.monotonic()
+            self.reload([configuration_url])
+            self.report_latency(start)
+            return
+        with self.pending_changes:
+            now = time.monotonic()
+            if self.pending:
+                instrumentation.count("reload_coalesced", settings=self.settings_name)
+            else:
+                self.first_event = now
+            self.pending[configuration_url] = None
+            self.deadline = now + self.debounce
+            if self.reloader is None:
+                self.closing = False
+                self.reloader = threading.Thread(target=self.run_reloader, daemon=True)
+                self.reloader.start()
+            self.pending_changes.notify()
+
+    def run_reloader(self):
+        while True:
+            with self.pending_changes:
+                while not self.pending and not self.closing:
+                    self.pending_changes.wait()
+                remaining = self.deadline - time.monotonic()
+                while remaining > 0 and not self.closing:
+                    self.pending_changes.wait(remaining)
+                    remaining = self.deadline - time.monotonic()
+                if self.closing:
+                    return
+                urls = list(self.pending)
+                self.pending.clear()
+                first_event = self.first_event
+            try:
+                self.reload(urls)
+            except Exception:
+                instrumentation.count(
+                    "reload_failed", settings=self.settings_name, reason="error"
+                )
+                logger.exception(
+                    "Error while reloading %s, skipping update.", self.settings_name
+                )
+            self.report_latency(first_event)
+
+    def report_latency(self, first_event: float):
+        if instrumentation.instruments:
+            instrumentation.timing(
+                "watch_latency",
+                time.monotonic() - first_event,
+                settings=self.settings_name,
             )
+
+    def reload(self, configuration_urls: Iterable[str]):
+        with instrumentation.timed("reload", settings=self.settings_name):
+            self._reload(configuration_urls)
+
+    def refreshed(self, configuration_url: str, config: Configuration):
+        """
+        Reload the source at `configuration_url`, already fetched again
+        as `config` (e.g. in the background, see `cache.SourceCache`).
+        """
+        with instrumentation.timed("reload", settings=self.settings_name):
+            self._reload([configuration_url], {configuration_url: config})
+
+    def _reload(self, configuration_urls: Iterable[str], refreshed: dict = None):
+        # only the changed configurations are fetched again: the other
+        # layers are merged from their last parsed content and the
+        # result is validated once.
+        refreshed = refreshed or {}
+        with self.lock:
+            configurations = self.configurations.copy()
+            changed_urls = []
+            for url in configuration_urls:
+                # the last good version of a source failing is kept
+                try:
+                    config = self.refetch(url, refreshed.get(url))
+                except (ParseException, frontends.UnknownFrontend):
+                    instrumentation.count(
+                        "reload_failed", settings=self.settings_name, reason="parse"
+                    )
+                    logger.warning(
+                        "Could not parse '%s', keeping its last version.",
+                        url,
+                        exc_info=True,
+                    )
+                    continue
+                except Exception:
+                    instrumentation.count(
+                        "reload_failed", settings=self.settings_name, reason="fetch"
+                    )
+                    logger.warning(
+                        "Could not fetch '%s', keeping its last version.",
+                        url,
+                        exc_info=True,
+                    )
+                    continue
+                if config is not None:
+                    configurations[url] = config
+                    changed_urls.append(url)
+            if not changed_urls:
+                self.count_skipped("unchanged")
+                return
+            merged = _merge(configurations.values())
+            if merged == self.merged:
+                # the changes were overridden by other layers
+                self.configurations = configurations
+                self.count_skipped("overridden")
+                return
+            try:
+                new = _parse_settings(self.root_settings.__class__, merged, self.lazy)
+            except pydantic.ValidationError as e:
+                instrumentation.count(
+                    "reload_failed", settings=self.settings_name, reason="validation"
+                )
+                logger.warning(
+                    "Ignoring validation errors encountered while updating "
+                    "configuration from %s:\n%s\nSkipping update.",
+                    ", ".join(f"'{url}'" for url in changed_urls),
+                    e,
+                )
+                return
+            # configurations are replaced only when valid, so that later
+            # reloads are merged with the last good version of each layer.
+            self.configurations = configurations
+            changes = self.apply(new, merged)
+            if self.snapshot_dir is not None:
+                from . import snapshot
+
+                snapshot.save(self.snapshot_dir, new.__class__, new, configurations)
+        self.notify(changes)
+
+    def count_skipped(self, reason: str):
+        instrumentation.count(
+            "reload_skipped", settings=self.settings_name, reason=reason
+        )
+
+    def publish(self, new: Settings, merged: dict):
+        """
+        Replace the settings with `new`, validated from the merged
+        configurations `merged`, and notify subscribers.
+        """
+        with self.lock:
+            changes = self.apply(new, merged)
+        self.notify(changes)
+
+    def apply(self, new: Settings, merged: dict) -> list:
+        with instrumentation.timed("apply", settings=self.settings_name):
+            return self._apply(new, merged)
+
+    def _apply(self, new: Settings, merged: dict) -> list:
+        if self.lazy:
+            # changes are only known for the raw data
+            changes = diff(self.merged, merged)
+        else:
+            changes = self._diff_tree(new, merged)
+        self.merged = merged
+        index = self.root_settings._index
+        # assigned to since indexed: the changes do not tell what to update
+        stale = index is not None and index.stale
+        if self.copy_on_write:
+            if index is not None:
+                if stale:
+                    new._index = PathIndex.build(new)
+                else:
+                    new._index = index.updated(new, changes)
+            self.root_settings = new
+            # a single reference store publishes the new settings
+            self.handle.settings = new
+        elif self.lazy:
+            _apply_sections(self.root_settings, new, changes)
+        else:
+            for change in changes:
+                _apply_change(self.root_settings, new, change.path)
+            if stale:
+                self.root_settings._index = PathIndex.build(self.root_settings)
+            else:
+                self.root_settings._index = index.updated(self.root_settings, changes)
+        return changes
+
+    def _diff_tree(self, new: Settings, merged: dict) -> list:
+        # only the fields whose raw data changed are exported and compared,
+        # unless validating a field may change others (e.g. root validators)
+        if not _independent_fields(new.__class__):
+            tree = new.dict()
+            changes = diff(self.tree, tree)
+            self.tree = tree
+            return changes
+        old = self.merged
+        keys = {
+            key
+            for key in old.keys() | merged.keys()
+            if old.get(key, MISSING) != merged.get(key, MISSING)
+        }
+        names = {
+            name
+            for name, field in new.__fields__.items()
+            if field.alias in keys or name in keys
+        }
+        if not names:
+            return []
+        fields = new.dict(include=names)
+        changes = diff({name: self.tree[name] for name in fields}, fields)
+        self.tree = {**self.tree, **fields}
+        return changes
+
+    def subscribe(self, path: str, callback: Callable):
+        """
+        Call `callback` with the list of changes affecting the dotted
+        `path` (e.g. "server.port", or "server" for any of its values)
+        whenever a reload changes it.
+        """
+        with self.lock:
+            self.subscribers.setdefault(split_path(path), []).append(callback)
+
+    def unsubscribe(self, path: str, callback: Callable):
+        with self.lock:
+            callbacks = self.subscribers.get(split_path(path), [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.subscribers.pop(split_path(path), None)
+
+    def notify(self, changes: list):
+        with self.lock:
+            subscribers = dict(self.subscribers)
+        if not subscribers or not changes:
             return
-        for config in self.subsequent_configurations(configuration_url):
-            config = self.configurations[config]
-            new_settings, _ = _go_catch_one(self.root_settings.__class__, config.url)
-            new.update(new_settings.dict())
-        self.root_settings.update(new.dict())
+        affected = {}
+        for change in changes:
+            # subscriptions to the changed path and to its parents
+            for length in range(len(change.path) + 1):
+                if change.path[:length] in subscribers:
+                    affected.setdefault(change.path[:length], []).append(change)
+            if isinstance(change.old, dict) or isinstance(change.new, dict):
+                # a whole section appeared, disappeared or was replaced
+                for path in subscribers:
+                    if len(path) > len(change.path) and (
+                        path[: len(change.path)] == change.path
+                    ):
+                        affected.setdefault(path, []).append(change)
+        for path, path_changes in affected.items():
+            for callback in subscribers[path]:
+                try:
+                    callback(path_changes)
+                except Exception:
+                    logger.exception("Error in the subscriber of '%s'.", path)
+
+    def refetch(
+        self, configuration_url: str, current: Configuration = None
+    ) -> Optional[Configuration]:
+        # returns None when the configuration did not change
+        previous = self.configurations[configuration_url]
+        if current is not None:
+            config, check = current, "shared"
+        else:
+            config, check = sources.refresh(
+                configuration_url, self.root_settings.__class__, previous
+            )
+        if config is previous:
+            self.count_source(configuration_url, check)
+            return None
+        if config.digest is not None and config.digest == previous.digest:
+            # e.g. previous was loaded from a snapshot
+            self.count_source(configuration_url, "digest")
+            return None
+        # possibly fetched by another root
+        self.statistics["misses"] += 1
+        instrumentation.count("source_changed", url=configuration_url)
+        return config
+
+    def count_source(self, configuration_url: str, check: str):
+        self.statistics[f"{check}_hits"] += 1
+        instrumentation.count("source_unchanged", url=configuration_url, check=check)
 
     def register_watchers(self):
         for url in self.configurations:
             self.register_watcher_for_url(url)
 
     def register_watcher_for_url(self, url: str):
-        config = self.configurations[url]
+        # a single watcher is shared by all the roots including the source
+        callback = functools.partial(self.watch_callback, url)
         watcher_type, _ = url.split("://")
-        watcher_class = watchers.get_watcher(watcher_type)
-        config.watcher = watcher_class(url, functools.partial(self.watch_callback, url))
-        config.watcher.start()
+        sources.watch(
+            url,
+            self.root_settings.__class__,
+            callback,
+            self.watch_options.get(watcher_type),
+        )
+        self.watching.append((url, callback))
 
     def shutdown_watchers(self):
+        watching, self.watching = self.watching, []
+        for url, callback in watching:
+            sources.unwatch(url, self.root_settings.__class__, callback)
         for config in self.configurations.values():
+            # watchers owned by the root (e.g. attached shared settings)
             if config.watcher:
                 config.watcher.stop()
+        with self.pending_changes:
+            reloader, self.reloader = self.reloader, None
+            self.closing = True
+            self.pending.clear()
+            self.pending_changes.notify()
+        if reloader is not None and reloader is not threading.current_thread():
+            reloader.join()
+
+
+def _independent_fields(settings_class: Type[Settings]) -> bool:
+    # whether the value of each field only depends on its own data
+    return not (
+        settings_class.__validators__
+        or settings_class.__pre_root_validators__
+        or settings_class.__post_root_validators__
+        or settings_class.__config__.extra is not pydantic.Extra.ignore
+    )
+
+
+def _apply_change(settings: Settings, new: Settings, path: tuple):
+    # sets the value at `path` in `settings` to the one in `new`
+    target, source = settings, new
+    for key in path[:-1]:
+        target_value, source_value = getattr(target, key), getattr(source, key)
+        if not isinstance(target_value, pydantic.BaseModel) or (
+            target_value.__class__ is not source_value.__class__
+        ):
+            # not a nested section (e.g. a dict field): replace it whole
+            setattr(target, key, source_value)
+            return
+        target, source = target_value, source_value
+    setattr(target, path[-1], getattr(source, path[-1]))
+
+
+def _apply_sections(settings: Settings, new: Settings, changes: list):
+    # with lazy validation, changes are paths in the raw data: every
+    # changed field is replaced whole, keeping pending sections lazy.
+    aliases = {change.path[0] for change in changes}
+    pending = lazy.pending(new)
+    for name, field in settings.__fields__.items():
+        if field.alias not in aliases:
+            continue
+        if name in pending:
+            settings._lazy = {**(settings._lazy or {}), name: new._lazy[name]}
+            settings.__dict__.pop(name, None)
+        else:
+            setattr(settings, name, getattr(new, name))
 
 
 roots_registry: dict[Type[Settings], RootSettingsManager] = {}
@@ -97,6 +782,17 @@ roots_registry: dict[Type[Settings], RootSettingsManager] = {}
 def shutdown_watchers():
     for manager in roots_registry.values():
         manager.shutdown_watchers()
+    # including the ones of roots that were replaced
+    sources.shutdown()
+    watchers.shutdown_hubs()
+
+
+def subscribe(settings_class: Type[Settings], path: str, callback: Callable):
+    roots_registry[settings_class].subscribe(path, callback)
+
+
+def unsubscribe(settings_class: Type[Settings], path: str, callback: Callable):
+    roots_registry[settings_class].unsubscribe(path, callback)
 
 
 class NoConfigurationsException(DoggoException):
@@ -104,47 +800,279 @@ class NoConfigurationsException(DoggoException):
         super().__init__("No configuration URLs supplied.")
 
 
+class ParseException(DoggoException):
+    def __init__(self, url, error):
+        self.url = url
+        super().__init__(f"could not parse '{self.url}': {error}")
+
+
 def go_catch(
     settings_class: Type[Settings],
     configurations: Iterable[Union[str, Path]],
     watch=False,
+    max_workers: int = 1,
+    debounce: float = 0.1,
+    snapshot_dir: Union[str, Path] = None,
+    copy_on_write=False,
+    lazy=False,
+    source_cache=None,
+    watch_options: dict = None,
 ):
-    settings = None
-    config_objects = collections.OrderedDict()
-    for config_url in configurations:
-        if isinstance(config_url, Path):
-            config_url = "file://" + str(config_url)
-        else:
-            try:
-                client_type, url = config_url.split("://")
-            except ValueError:
-                # when no protocol is specified the file://
-                # protocol is assumed
-                config_url = "file://" + config_url
-        settings, config = _go_catch_one(settings_class, config_url)
-        config_objects[config_url] = config
-    if settings is None:
+    """
+    Fetch, merge and validate `configurations` into an instance of
+    `settings_class`.
+
+    With `max_workers` greater than one, configurations are fetched
+    concurrently by a pool of threads; they are still merged in the
+    order in which they are given.
+
+    When watching, changes are reloaded once no further change has been
+    seen for `debounce` seconds, so that a burst of events on one or
+    more files results in a single reload. Use 0 to reload on every event.
+    `watch_options` are keyword arguments of the watchers, by protocol,
+    e.g. {"https": {"long_poll": 30}} (see the `get_watcher` function of
+    each watcher module).
+
+    With a `snapshot_dir`, the validated settings are stored there and
+    loaded on later calls for as long as the sources and the schema of
+    `settings_class` do not change, skipping parsing and validation.
+
+    With `copy_on_write`, a `SettingsHandle` is returned instead of the
+    settings: reloads do not modify the settings in place, they publish
+    a new instance through the handle.
+
+    With `lazy`, nested sections are validated the first time they are
+    accessed; call `validate_all()` on the settings to validate them all
+    and report their errors. Reloads then diff and report changes on the
+    raw configurations, and skip the path index used by `Settings.get`.
+
+    With a `source_cache` (see `cache.SourceCache`), remote sources are
+    served from their last good version while they are fetched again in
+    the background.
+    """
+    urls = [_normalize_url(config_url) for config_url in configurations]
+    if not urls:
         raise NoConfigurationsException()
-    manager = RootSettingsManager(settings, config_objects)
+    options = dict(
+        debounce=debounce,
+        snapshot_dir=snapshot_dir,
+        copy_on_write=copy_on_write,
+        lazy=lazy,
+        watch_options=watch_options,
+    )
+    if snapshot_dir is not None:
+        from . import snapshot
+
+        cached = snapshot.load(snapshot_dir, settings_class, urls)
+        if cached is not None:
+            settings, config_objects = cached
+            return _register(settings_class, settings, config_objects, watch, options)
+    load = sources.load if source_cache is None else source_cache.load
+    if max_workers > 1 and len(urls) > 1:
+        import concurrent.futures
+
+        load = functools.partial(load, settings_class=settings_class)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            config_objects = list(executor.map(load, urls))
+    else:
+        config_objects = [load(url, settings_class) for url in urls]
+    settings = _catch(settings_class, config_objects, watch, options)
+    if source_cache is not None:
+        # sources refreshed while the settings were being validated
+        source_cache.catch_up(roots_registry[settings_class])
+    return settings
+
+
+async def go_catch_async(
+    settings_class: Type[Settings],
+    configurations: Iterable[Union[str, Path]],
+    watch=False,
+    debounce: float = 0.1,
+    copy_on_write=False,
+    lazy=False,
+    watch_options: dict = None,
+):
+    """
+    Same as `go_catch`, but every configuration is fetched concurrently
+    on the running event loop.
+    """
+    urls = [_normalize_url(config_url) for config_url in configurations]
+    if not urls:
+        raise NoConfigurationsException()
+    options = dict(
+        debounce=debounce,
+        copy_on_write=copy_on_write,
+        lazy=lazy,
+        watch_options=watch_options,
+    )
+    import asyncio
+
+    started = time.monotonic()
+    config_objects = await asyncio.gather(
+        *(_fetch_one_async(url, settings_class) for url in urls)
+    )
+    for config in config_objects:
+        sources.adopt(config, settings_class, started)
+    return _catch(settings_class, config_objects, watch, options)
+
+
+def _catch(
+    settings_class: Type[Settings],
+    config_objects: Iterable[Configuration],
+    watch: bool,
+    options: dict,
+):
+    config_objects = collections.OrderedDict(
+        (config.url, config) for config in config_objects
+    )
+    settings = _validate(settings_class, config_objects.values(), options.get("lazy"))
+    if options.get("snapshot_dir") is not None:
+        from . import snapshot
+
+        snapshot.save(options["snapshot_dir"], settings_class, settings, config_objects)
+    return _register(settings_class, settings, config_objects, watch, options)
+
+
+def _register(
+    settings_class: Type[Settings],
+    settings: Settings,
+    config_objects: collections.OrderedDict[str, Configuration],
+    watch: bool,
+    options: dict,
+):
+    # options are the keyword arguments of RootSettingsManager
+    manager = RootSettingsManager(settings, config_objects, **options)
     roots_registry[settings_class] = manager
     if watch:
         manager.register_watchers()
+    if manager.copy_on_write:
+        return manager.handle
     return settings
 
 
-def _go_catch_one(settings: Type[Settings], configuration_url: str):
+def _normalize_url(config_url: Union[str, Path]) -> str:
+    config_url = str(config_url)
+    if "://" not in config_url:
+        # when no protocol is specified the file://
+        # protocol is assumed
+        config_url = "file://" + config_url
+    if config_url.startswith("file://"):
+        # a single source for the different paths of a file
+        # (e.g. "common.json" and "./common.json")
+        return "file://" + os.path.abspath(config_url[len("file://") :])
+    return config_url
+
+
+def _fetch_one(
+    configuration_url: str, settings_class: Type[Settings] = None
+) -> Configuration:
+    config = _fetch_content(configuration_url, settings_class=settings_class)
+    _parse(config)
+    return config
+
+
+def _fetch_content(
+    configuration_url: str,
+    previous: Configuration = None,
+    settings_class: Type[Settings] = None,
+) -> Configuration:
     client_type, url = configuration_url.split("://")
     client = clients.get_client(client_type)
-    config = Configuration(url=configuration_url)
-    client.go_catch(config, url)
+    config = Configuration(url=configuration_url, settings_class=settings_class)
+    paths = client.expand(url)
+    if paths is not None:
+        from . import fragments
+
+        fragments.fetch(client, config, paths, previous)
+        return config
+    if previous is not None:
+        # allows conditional requests
+        config.etag = previous.etag
+        config.last_modified = previous.last_modified
+    with instrumentation.timed("fetch", url=configuration_url):
+        client.go_catch(config, url)
+    if config.digest is None:
+        # unless the client parsed the source itself
+        config.digest = content_digest(config.content)
+    return config
+
+
+async def _fetch_one_async(
+    configuration_url: str, settings_class: Type[Settings] = None
+) -> Configuration:
+    client_type, url = configuration_url.split("://")
+    client = clients.get_async_client(client_type)
+    if client.expand(url) is not None:
+        import asyncio
+
+        # collections are fetched by their own pool of threads
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, _fetch_one, configuration_url, settings_class
+        )
+    config = Configuration(url=configuration_url, settings_class=settings_class)
+    with instrumentation.timed("fetch", url=configuration_url):
+        await client.go_catch(config, url)
+    if config.digest is None:
+        config.digest = content_digest(config.content)
+    _parse(config)
+    return config
+
+
+def _parse(config: Configuration):
+    if config.fragments is not None:
+        from . import fragments
+
+        fragments.parse(config, _parse)
+        return
+    if config.content is None and config.parsed_content is not None:
+        # parsed by the client itself (e.g. environment variables)
+        return
     frontend = frontends.get_frontend(config.mime_type)
-    frontend.parse(config)
-    return settings.parse_obj(config.parsed_content), config
+    try:
+        with instrumentation.timed("parse", url=config.url, mime_type=config.mime_type):
+            frontend.parse(config)
+    except Exception as e:
+        # the frontend's own error is chained
+        raise ParseException(config.url, e) from e
+    finally:
+        # the raw content is not needed anymore: only the
+        # parsed one is kept, and compared through the digest
+        config.release_content()
+
+
+def _validate(
+    settings_class: Type[Settings],
+    configurations: Iterable[Configuration],
+    lazy_sections=False,
+) -> Settings:
+    # layers are merged as raw data, so that a single validation
+    # is needed no matter how many configurations there are.
+    merged = _merge(configurations)
+    return _parse_settings(settings_class, merged, lazy_sections)
+
+
+def _merge(configurations: Iterable[Configuration]) -> dict:
+    with instrumentation.timed("merge"):
+        return merge_configurations(configurations)
+
+
+def _parse_settings(settings_class: Type[Settings], data: dict, lazy_sections=False):
+    with instrumentation.timed("validate", settings=settings_class.__qualname__):
+        if lazy_sections:
+            return lazy.parse_lazy(settings_class, data)
+        return settings_class.parse_obj(data)
 
 
 __all__ = [
     "Settings",
+    "SettingsHandle",
     "shutdown_watchers",
+    "subscribe",
+    "unsubscribe",
+    "Change",
     "NoConfigurationsException",
+    "ParseException",
     "go_catch",
+    "go_catch_async",
 ]
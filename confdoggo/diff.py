@@ -0,0 +1,60 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Any, NamedTuple
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+# value of a path that does not exist on one side of a change
+MISSING = _Missing()
+
+
+class Change(NamedTuple):
+    path: tuple
+    old: Any
+    new: Any
+
+    @property
+    def dotted_path(self) -> str:
+        return ".".join(map(str, self.path))
+
+
+def diff(old: dict, new: dict, prefix: tuple = ()) -> list:
+    """
+    Structural difference between two trees of dictionaries.
+
+    Returns the changes to the leaves (values that are not dictionaries
+    on both sides, lists included) in the order in which they appear in
+    `new`, followed by the removed paths.
+    """
+    changes = []
+    for key, new_value in new.items():
+        old_value = old.get(key, MISSING)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changes.extend(diff(old_value, new_value, prefix + (key,)))
+        elif old_value != new_value:
+            changes.append(Change(prefix + (key,), old_value, new_value))
+    for key, old_value in old.items():
+        if key not in new:
+            changes.append(Change(prefix + (key,), old_value, MISSING))
+    return changes
+
+
+def split_path(path: str) -> tuple:
+    return tuple(path.split(".")) if path else ()
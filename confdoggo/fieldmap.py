@@ -0,0 +1,109 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Names of the fields of a settings class as environment variables and
+command line options.
+
+The fields of `server.port` are named SERVER__PORT in the environment
+(sections are separated by two underscores) and server.port on the
+command line (dashes may replace underscores). The map is computed once
+per settings class, so that resolving overrides is a single pass over
+the variables or the arguments.
+"""
+
+import json
+from typing import Iterable, NamedTuple, Type
+
+import pydantic
+import pydantic.fields
+from pydantic.utils import lenient_issubclass
+
+ENV_DELIMITER = "__"
+
+# values of fields of these types are given as JSON
+_STRUCTURED_TYPES = (dict, list, tuple, set, frozenset, pydantic.BaseModel)
+
+
+class Target(NamedTuple):
+    path: tuple
+    # the value is JSON (e.g. a list)
+    structured: bool
+    # a boolean, which options may set without a value
+    flag: bool
+
+
+class FieldMap:
+    __slots__ = ("variables", "options")
+
+    def __init__(self, targets: Iterable[Target]):
+        self.variables = {}
+        self.options = {}
+        for target in targets:
+            variable = ENV_DELIMITER.join(str(key).upper() for key in target.path)
+            self.variables[variable] = target
+            self.options[option_key(".".join(target.path))] = target
+
+    @staticmethod
+    def decode(target: Target, value: str):
+        if target.structured:
+            try:
+                return json.loads(value)
+            except ValueError:
+                # left for validation to report
+                pass
+        return value
+
+
+def option_key(name: str) -> str:
+    return name.replace("-", "_")
+
+
+def field_map(settings_class: Type[pydantic.BaseModel]) -> FieldMap:
+    fields = settings_class.__dict__.get("__confdoggo_field_map__")
+    if fields is None:
+        fields = FieldMap(_targets(settings_class, (), (settings_class,)))
+        # on the class itself, not inherited: subclasses have other fields
+        setattr(settings_class, "__confdoggo_field_map__", fields)
+    return fields
+
+
+def _targets(model: Type[pydantic.BaseModel], prefix: tuple, ancestors: tuple):
+    for field in model.__fields__.values():
+        path = prefix + (field.alias,)
+        if (
+            field.shape == pydantic.fields.SHAPE_SINGLETON
+            and lenient_issubclass(field.type_, pydantic.BaseModel)
+            and field.type_ not in ancestors
+        ):
+            yield from _targets(field.type_, path, ancestors + (field.type_,))
+            continue
+        # recursive models end up here, and are given as JSON
+        structured = (
+            field.shape != pydantic.fields.SHAPE_SINGLETON
+            or lenient_issubclass(field.type_, _STRUCTURED_TYPES)
+        )
+        yield Target(path, structured, field.type_ is bool)
+
+
+def nest(assignments: Iterable[tuple]) -> dict:
+    """ The document setting each (path, value) of `assignments`. """
+    document = {}
+    for path, value in assignments:
+        section = document
+        for key in path[:-1]:
+            section = section.setdefault(key, {})
+        section[path[-1]] = value
+    return document
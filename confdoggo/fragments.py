@@ -0,0 +1,105 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Sources made of several documents, such as conf.d directories.
+
+A collection is a single layer: its fragments are merged in order into
+its parsed content, which is then merged with the other layers. When
+reloading, fragments whose fingerprint or digest did not change are not
+parsed again, so that editing one file of a large directory only costs
+that file.
+"""
+
+import hashlib
+from typing import List, Optional
+
+from . import instrumentation
+from .merge import merge_configurations
+from .utils import Configuration, content_digest
+
+# collections with more fragments than this to fetch are fetched
+# by a pool of threads.
+PARALLEL_THRESHOLD = 16
+MAX_WORKERS = 8
+
+
+def fetch(client, config: Configuration, paths: List[str], previous=None):
+    """
+    Fetch the fragments `paths` of the collection `config`, reusing the
+    ones of `previous` (the last version of the collection) that did
+    not change.
+    """
+    protocol, _ = config.url.split("://")
+    reusable = {}
+    if previous is not None and previous.fragments:
+        reusable = {fragment.url: fragment for fragment in previous.fragments}
+
+    def fetch_fragment(path: str) -> Configuration:
+        url = f"{protocol}://{path}"
+        old = reusable.get(url)
+        if old is not None and old.fingerprint is not None:
+            if client.fingerprint(path) == old.fingerprint:
+                return old
+        fragment = Configuration(url=url)
+        with instrumentation.timed("fetch", url=url):
+            client.go_catch(fragment, path)
+        fragment.digest = content_digest(fragment.content)
+        if old is not None and fragment.digest == old.digest:
+            # touched, but not modified
+            fragment.release_content()
+            fragment.parsed_content = old.parsed_content
+        return fragment
+
+    if len(paths) > PARALLEL_THRESHOLD:
+        import concurrent.futures
+
+        workers = min(MAX_WORKERS, len(paths))
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            config.fragments = list(executor.map(fetch_fragment, paths))
+    else:
+        config.fragments = [fetch_fragment(path) for path in paths]
+    config.digest = combined_digest(config.fragments)
+    config.fingerprint = combined_fingerprint(config.fragments, paths)
+
+
+def combined_digest(fragments: List[Configuration]) -> str:
+    # renaming a fragment may change the order of the merge
+    digest = hashlib.blake2b(digest_size=16)
+    for fragment in fragments:
+        digest.update(f"{fragment.url}\0{fragment.digest}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def combined_fingerprint(
+    fragments: List[Configuration], paths: List[str]
+) -> Optional[tuple]:
+    # the same as the client's fingerprint of the whole collection
+    if any(fragment.fingerprint is None for fragment in fragments):
+        return None
+    return tuple(
+        (path, fragment.fingerprint) for path, fragment in zip(paths, fragments)
+    )
+
+
+def parse(config: Configuration, parse_fragment):
+    """
+    Parse the fragments of `config` that were fetched again with
+    `parse_fragment`, then merge all of them into its parsed content.
+    """
+    for fragment in config.fragments:
+        if fragment.content is not None:
+            parse_fragment(fragment)
+    config.parsed_content = merge_configurations(config.fragments)
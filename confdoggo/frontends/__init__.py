@@ -14,6 +14,7 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import abc
+from ..registry import Registry
 from ..utils import DoggoException, Configuration
 
 
@@ -29,6 +30,15 @@ class UnknownFrontend(DoggoException):
         super().__init__(f"for mime type '{self.mime_type}'.")
 
 
+class UnknownBackend(DoggoException, ValueError):
+    def __init__(self, backend, backends):
+        self.backend = backend
+        super().__init__(
+            f"unknown backend '{self.backend}', "
+            f"expected one of: {', '.join(backends)}."
+        )
+
+
 def json_frontend():
     from . import json
 
@@ -54,19 +64,24 @@ def yaml_frontend():
 #     return ini.IniFrontend()
 
 
-frontends_registry = {
-    # mime type -> frontend class
-    "application/json": json_frontend,
-    "application/x-yaml": yaml_frontend,
-    # TODO
-    # 'application/confdoggo': doggo_frontend,
-    # 'application/toml': toml_frontend,
-    # 'application/ini': ini_frontend,
-}
+# mime type -> frontend class
+frontends_registry = Registry(
+    "confdoggo.frontends",
+    {
+        "application/json": json_frontend,
+        "application/x-yaml": yaml_frontend,
+        "application/yaml": yaml_frontend,
+        "text/yaml": yaml_frontend,
+        # TODO
+        # 'application/confdoggo': doggo_frontend,
+        # 'application/toml': toml_frontend,
+        # 'application/ini': ini_frontend,
+    },
+)
 
 
 def get_frontend(mime_type: str):
     try:
-        return frontends_registry[mime_type]()
+        return frontends_registry.instance(mime_type)
     except KeyError:
         raise UnknownFrontend(mime_type)
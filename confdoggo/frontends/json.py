@@ -14,10 +14,65 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
-from . import BaseFrontend
-from ..utils import Configuration
+from . import BaseFrontend, UnknownBackend
+from ..utils import Configuration, MissingLibraryException
+
+
+def orjson_loads():
+    import orjson
+
+    def loads(content):
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the standard library (e.g. NaN,
+            # integers wider than 64 bits): the latter has the last word.
+            return json.loads(content)
+
+    return loads
+
+
+def ujson_loads():
+    import ujson
+
+    return ujson.loads
+
+
+def json_loads():
+    return json.loads
+
+
+backends = {
+    # in order of preference
+    "orjson": orjson_loads,
+    "ujson": ujson_loads,
+    "json": json_loads,
+}
+
+# backend -> the extra of confdoggo installing it, if any
+extras = {"orjson": "json"}
+
+
+def get_backend(name: str = None):
+    """ Returns the name and the loads function of the JSON backend. """
+    if name is not None:
+        if name not in backends:
+            raise UnknownBackend(name, backends)
+        try:
+            return name, backends[name]()
+        except ImportError:
+            raise MissingLibraryException(name, extras.get(name))
+    for name, backend in backends.items():
+        try:
+            return name, backend()
+        except ImportError:
+            continue
 
 
 class JsonFrontend(BaseFrontend):
+    def __init__(self, backend: str = None):
+        self.backend, self.loads = get_backend(backend)
+
     def parse(self, config: Configuration):
-        config.parsed_content = json.loads(config.content)
+        # content may be either str or bytes
+        config.parsed_content = self.loads(config.content)
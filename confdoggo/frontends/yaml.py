@@ -13,7 +13,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from . import BaseFrontend
+from . import BaseFrontend, UnknownBackend
 from ..utils import Configuration, MissingLibraryException
 
 
@@ -23,6 +23,30 @@ except ImportError:
     raise MissingLibraryException("PyYAML", "yaml")
 
 
+backends = {
+    # in order of preference
+    "libyaml": getattr(yaml, "CSafeLoader", None),
+    "python": yaml.SafeLoader,
+}
+
+
+def get_backend(name: str = None):
+    """ Returns the name and the loader class of the YAML backend. """
+    if name is not None:
+        if name not in backends:
+            raise UnknownBackend(name, backends)
+        if backends[name] is None:
+            raise MissingLibraryException(name, "yaml")
+        return name, backends[name]
+    for name, loader in backends.items():
+        if loader is not None:
+            return name, loader
+
+
 class YamlFrontend(BaseFrontend):
+    def __init__(self, backend: str = None):
+        self.backend, self.loader = get_backend(backend)
+
     def parse(self, config: Configuration):
-        config.parsed_content = yaml.safe_load(config.content)
+        # content may be either str or bytes
+        config.parsed_content = yaml.load(config.content, Loader=self.loader)
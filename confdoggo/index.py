@@ -0,0 +1,153 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bisect
+from typing import Iterable
+
+import pydantic
+
+from .diff import MISSING
+
+
+class Writes:
+    """
+    Number of assignments to the settings of a tree (e.g. settings.x = 2),
+    shared by all of its models: indexes built before the last one may
+    not be up to date, see `PathIndex.stale`.
+    """
+
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+
+def _track(settings: pydantic.BaseModel, writes: Writes):
+    # only settings count their assignments (see `Settings.__setattr__`)
+    if "_writes" in settings.__private_attributes__:
+        object.__setattr__(settings, "_writes", writes)
+
+
+def track(settings: pydantic.BaseModel, writes: Writes):
+    """ Count the assignments to every model of `settings` in `writes`. """
+    _track(settings, writes)
+    for name in settings.__fields__:
+        value = getattr(settings, name)
+        if isinstance(value, pydantic.BaseModel):
+            track(value, writes)
+
+
+def flatten(settings: pydantic.BaseModel, prefix: str = "", writes=None) -> dict:
+    # nested models are walked, any other value (e.g. a dict) is a leaf
+    if writes is not None:
+        _track(settings, writes)
+    values = {}
+    for name in settings.__fields__:
+        value = getattr(settings, name)
+        if isinstance(value, pydantic.BaseModel):
+            values.update(flatten(value, f"{prefix}{name}.", writes))
+        else:
+            values[f"{prefix}{name}"] = value
+    return values
+
+
+class PathIndex:
+    """
+    Flattened view of a settings tree, mapping the dotted paths of its
+    leaves to their values.
+
+    Indexes are never modified: `updated` returns a new one, so that it
+    can be swapped in with a single reference store.
+    """
+
+    __slots__ = ("values", "_keys", "writes", "count")
+
+    def __init__(self, values: dict, writes: Writes, keys: list = None):
+        self.values = values
+        # sorted paths, for prefix lookups; built on first use
+        self._keys = keys
+        # assignments to the indexed tree, and their number when indexed
+        self.writes = writes
+        self.count = writes.count
+
+    @classmethod
+    def build(cls, settings: pydantic.BaseModel):
+        writes = getattr(settings, "_writes", None) or Writes()
+        return cls(flatten(settings, "", writes), writes)
+
+    @property
+    def stale(self) -> bool:
+        # the indexed tree was assigned to since
+        return self.count != self.writes.count
+
+    @property
+    def keys(self) -> list:
+        if self._keys is None:
+            self._keys = sorted(self.values)
+        return self._keys
+
+    def prefixed(self, prefix: str) -> Iterable[str]:
+        # paths equal to `prefix` or below it, in sorted order
+        keys = self.keys
+        if prefix in self.values:
+            yield prefix
+        prefix += "."
+        for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            yield keys[i]
+
+    def items(self, prefix: str = ""):
+        if not prefix:
+            for key in self.keys:
+                yield key, self.values[key]
+            return
+        for key in self.prefixed(prefix):
+            yield key, self.values[key]
+
+    def updated(self, settings: pydantic.BaseModel, changes: Iterable):
+        """
+        Index of `settings`, given the changes (see `confdoggo.diff`)
+        that turned the settings indexed by `self` into them.
+        """
+        writes = getattr(settings, "_writes", None)
+        if writes is None:
+            # a new tree (copy on write), not tracked yet
+            writes = Writes()
+            track(settings, writes)
+        values = dict(self.values)
+        keys_changed = False
+        for change in changes:
+            # the path of a change may go through values that are not
+            # models (e.g. dict fields): their path is the leaf to update.
+            target, path = settings, []
+            for key in change.path:
+                path.append(str(key))
+                target = getattr(target, key, MISSING)
+                if not isinstance(target, pydantic.BaseModel):
+                    break
+            dotted = ".".join(path)
+            stale = list(self.prefixed(dotted))
+            for key in stale:
+                values.pop(key, None)
+            if isinstance(target, pydantic.BaseModel):
+                fresh = flatten(target, dotted + ".", writes)
+            elif target is MISSING:
+                fresh = {}
+            else:
+                fresh = {dotted: target}
+            values.update(fresh)
+            keys_changed |= stale != sorted(fresh)
+        return PathIndex(values, writes, None if keys_changed else self._keys)
@@ -0,0 +1,218 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Timings and counters of the stages of loading and reloading settings.
+
+Events are reported to the instruments added with `add_instrument`;
+while there are none, reporting them costs next to nothing. Timed
+events (in seconds):
+
+- fetch: a client fetching a source (tags: url),
+- parse: a frontend parsing a source (tags: url, mime_type),
+- merge: merging the layers of a root,
+- validate: validating the merged layers (tags: settings),
+- apply: applying validated settings to a root (tags: settings),
+- reload: a whole reload (tags: settings),
+- watch_latency: from the first watcher event to the end of the reload
+  serving it, including the debounce window (tags: settings).
+
+Counters:
+
+- source_unchanged: a source found unchanged when reloading (tags:
+  url, check, i.e. fingerprint, not_modified, digest or shared, when
+  already checked for another root since its last change),
+- source_changed: a source found changed when reloading, fetched and
+  parsed by this root or another one including it (tags: url),
+- reload_coalesced: a watcher event served by an already pending
+  reload (tags: settings),
+- reload_skipped: a reload that left the settings unchanged
+  (tags: settings, reason, i.e. unchanged or overridden),
+- reload_failed: a reload that failed (tags: settings, reason, i.e.
+  validation, error, or fetch and parse when a source could not be
+  fetched or parsed and its last version was kept).
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import logging
+import threading
+import time
+
+
+class Instrument:
+    """ Receives events: subclasses override the methods they need. """
+
+    def timing(self, event: str, seconds: float, tags: dict):
+        pass
+
+    def count(self, event: str, value: int, tags: dict):
+        pass
+
+
+instruments: list[Instrument] = []
+
+
+def add_instrument(instrument: Instrument):
+    global instruments
+    # replaced rather than modified, so that reporting needs no lock
+    instruments = instruments + [instrument]
+
+
+def remove_instrument(instrument: Instrument):
+    global instruments
+    instruments = [other for other in instruments if other is not instrument]
+
+
+_disabled = contextlib.nullcontext()
+
+
+def timed(event: str, **tags):
+    """ Context manager reporting the time taken by its block. """
+    if not instruments:
+        return _disabled
+    return _Timer(event, tags)
+
+
+class _Timer:
+    __slots__ = ("event", "tags", "start")
+
+    def __init__(self, event: str, tags: dict):
+        self.event = event
+        self.tags = tags
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        timing(self.event, time.perf_counter() - self.start, **self.tags)
+
+
+def timing(event: str, seconds: float, **tags):
+    for instrument in instruments:
+        instrument.timing(event, seconds, tags)
+
+
+def count(event: str, value: int = 1, **tags):
+    for instrument in instruments:
+        instrument.count(event, value, tags)
+
+
+class LoggingInstrument(Instrument):
+    """ Logs every event, by default to the 'confdoggo' logger. """
+
+    def __init__(self, logger: logging.Logger = None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger("confdoggo")
+        self.level = level
+
+    def timing(self, event: str, seconds: float, tags: dict):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level, "%s took %.3f ms %s", event, seconds * 1e3, tags
+            )
+
+    def count(self, event: str, value: int, tags: dict):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s +%d %s", event, value, tags)
+
+
+class Summary:
+    __slots__ = ("count", "total", "min", "max", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __repr__(self):
+        return (
+            f"Summary(count={self.count}, mean={self.mean:.6f}, "
+            f"min={self.min:.6f}, max={self.max:.6f})"
+        )
+
+
+class MetricsRegistry(Instrument):
+    """
+    Aggregates events in process: counters, and count, total, minimum,
+    maximum and last value of timings, by event and tags.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = collections.Counter()
+        self.timings: dict[tuple, Summary] = {}
+
+    def timing(self, event: str, seconds: float, tags: dict):
+        key = _key(event, tags)
+        with self.lock:
+            summary = self.timings.get(key)
+            if summary is None:
+                summary = self.timings[key] = Summary()
+            summary.add(seconds)
+
+    def count(self, event: str, value: int, tags: dict):
+        key = _key(event, tags)
+        with self.lock:
+            self.counters[key] += value
+
+    def counter(self, event: str, **tags) -> int:
+        """ Total of the counter, over every value of the tags not given. """
+        with self.lock:
+            return sum(
+                value
+                for key, value in self.counters.items()
+                if _matches(key, event, tags)
+            )
+
+    def summaries(self, event: str, **tags) -> dict:
+        """ Summaries of the timings of `event`, by tags. """
+        with self.lock:
+            return {
+                key[1]: summary
+                for key, summary in self.timings.items()
+                if _matches(key, event, tags)
+            }
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timings.clear()
+
+
+def _key(event: str, tags: dict) -> tuple:
+    return event, tuple(sorted(tags.items()))
+
+
+def _matches(key: tuple, event: str, tags: dict) -> bool:
+    if key[0] != event:
+        return False
+    key_tags = dict(key[1])
+    return all(key_tags.get(name) == value for name, value in tags.items())
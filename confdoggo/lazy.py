@@ -0,0 +1,128 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Lazy validation of nested settings sections.
+
+Sections are fields whose type is a model supporting lazy validation
+(i.e. declaring a `_lazy` private attribute, as `Settings` does). Their
+raw data is kept aside and validated the first time they are accessed.
+"""
+
+from typing import Type
+
+import pydantic
+import pydantic.fields
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.main import validate_model
+from pydantic.utils import lenient_issubclass
+
+
+def supports_lazy(model_class) -> bool:
+    return lenient_issubclass(model_class, pydantic.BaseModel) and (
+        "_lazy" in getattr(model_class, "__private_attributes__", {})
+    )
+
+
+def parse_lazy(model_class: Type[pydantic.BaseModel], data):
+    """
+    Validates `data` as `model_class`, except for nested sections,
+    which are validated on first access.
+    """
+    if not isinstance(data, dict):
+        return model_class.parse_obj(data)
+    lazy = {}
+    for name, field in model_class.__fields__.items():
+        if (
+            field.shape == pydantic.fields.SHAPE_SINGLETON
+            and supports_lazy(field.type_)
+            and isinstance(data.get(field.alias), dict)
+        ):
+            lazy[name] = data[field.alias]
+    if not lazy:
+        return model_class.parse_obj(data)
+    aliases = {model_class.__fields__[name].alias for name in lazy}
+    eager = {key: value for key, value in data.items() if key not in aliases}
+    values, fields_set, error = validate_model(model_class, eager)
+    if error is not None:
+        # lazy sections are reported missing, since they were left out
+        errors = [
+            wrapper
+            for wrapper in error.raw_errors
+            if not (
+                isinstance(wrapper, ErrorWrapper)
+                and len(wrapper.loc_tuple()) == 1
+                and wrapper.loc_tuple()[0] in aliases
+            )
+        ]
+        if errors:
+            raise pydantic.ValidationError(errors, model_class)
+    settings = model_class.construct(_fields_set=fields_set | lazy.keys(), **values)
+    for name in lazy:
+        settings.__dict__.pop(name, None)
+    settings._lazy = lazy
+    return settings
+
+
+def pending(settings: pydantic.BaseModel) -> list:
+    # names of the sections that were not validated yet
+    lazy = settings._lazy
+    if not lazy:
+        return []
+    return [name for name in lazy if name not in settings.__dict__]
+
+
+def materialize(settings: pydantic.BaseModel, name: str):
+    raw = (settings._lazy or {}).get(name)
+    if name in settings.__dict__ or raw is None:
+        # another thread was faster
+        return settings.__dict__[name]
+    field = settings.__fields__[name]
+    try:
+        value = parse_lazy(field.type_, raw)
+    except pydantic.ValidationError as e:
+        raise pydantic.ValidationError(
+            [ErrorWrapper(e, loc=field.alias)], settings.__class__
+        )
+    value = settings.__dict__.setdefault(name, value)
+    # replaced rather than modified: copies of the settings share it
+    lazy = {key: raw for key, raw in (settings._lazy or {}).items() if key != name}
+    settings._lazy = lazy or None
+    return value
+
+
+def validate_all(settings: pydantic.BaseModel):
+    """ Validates every section, raising all the errors at once. """
+    errors = []
+    for name in pending(settings):
+        try:
+            materialize(settings, name)
+        except pydantic.ValidationError:
+            # validated again as a whole, for the errors of its own
+            # sections too (they are left out when its fields fail)
+            field = settings.__fields__[name]
+            try:
+                field.type_.parse_obj(settings._lazy[name])
+            except pydantic.ValidationError as e:
+                errors.append(ErrorWrapper(e, loc=field.alias))
+    for name, field in settings.__fields__.items():
+        value = settings.__dict__.get(name)
+        if supports_lazy(value.__class__):
+            try:
+                validate_all(value)
+            except pydantic.ValidationError as e:
+                errors.append(ErrorWrapper(e, loc=field.alias))
+    if errors:
+        raise pydantic.ValidationError(errors, settings.__class__)
@@ -0,0 +1,56 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Iterable
+from .utils import Configuration, DoggoException
+
+
+class InvalidLayerException(DoggoException):
+    def __init__(self, url):
+        self.url = url
+        super().__init__(
+            f"configuration from '{self.url}' is not a mapping and cannot be merged."
+        )
+
+
+def deep_merge(base: dict, overlay: dict) -> dict:
+    """
+    Merge `overlay` on top of `base`, recursing into nested dictionaries.
+
+    Values that are not dictionaries (including lists) in `overlay`
+    replace the ones in `base`. Neither argument is modified: only the
+    dictionaries along the merged paths are copied, the rest is shared.
+    """
+    merged = dict(base)
+    for key, value in overlay.items():
+        current = merged.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[key] = deep_merge(current, value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_configurations(configurations: Iterable[Configuration]) -> dict:
+    # configurations are given in increasing order of importance
+    merged = {}
+    for config in configurations:
+        if config.parsed_content is None:
+            # empty documents do not override anything
+            continue
+        if not isinstance(config.parsed_content, dict):
+            raise InvalidLayerException(config.url)
+        merged = deep_merge(merged, config.parsed_content)
+    return merged
@@ -0,0 +1,109 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Optional
+
+
+class Registry(dict):
+    """
+    Factories by name, e.g. clients by URL protocol.
+
+    Each factory is called once, and the object it returns is reused by
+    every later lookup: stateful objects (e.g. clients with a pool of
+    connections) are shared by the whole process.
+
+    Names that are not registered are looked up in the `group` entry
+    points of the installed distributions, so that third party packages
+    can provide their own, e.g. in their pyproject.toml:
+
+        [tool.poetry.plugins."confdoggo.clients"]
+        "s3" = "confdoggo_s3:S3Client"
+    """
+
+    def __init__(
+        self, group: str, factories: dict = None, from_plugin: Callable = None
+    ):
+        super().__init__(factories or {})
+        self.group = group
+        # turns the object loaded from an entry point into a factory
+        self.from_plugin = from_plugin
+        self.instances = {}
+        self.plugins = None
+        self.lock = threading.RLock()
+
+    def __setitem__(self, name: str, factory: Callable):
+        with self.lock:
+            super().__setitem__(name, factory)
+            self.instances.pop(name, None)
+
+    def __delitem__(self, name: str):
+        with self.lock:
+            super().__delitem__(name)
+            self.instances.pop(name, None)
+
+    def instance(self, name: str, fallback: Callable = None):
+        """
+        The object made by the factory registered for `name`, or by
+        `fallback` if there is none. Raises KeyError otherwise.
+        """
+        try:
+            # lock-free in the common case
+            return self.instances[name]
+        except KeyError:
+            pass
+        with self.lock:
+            if name not in self.instances:
+                factory = self.get(name) or self.plugin(name) or fallback
+                if factory is None:
+                    raise KeyError(name)
+                self.instances[name] = factory()
+            return self.instances[name]
+
+    def provides(self, name: str) -> bool:
+        return name in self or self.plugin(name) is not None
+
+    def plugin(self, name: str) -> Optional[Callable]:
+        if self.plugins is None:
+            # scanning the installed distributions is slow: done once
+            self.plugins = {
+                entry_point.name: entry_point
+                for entry_point in _entry_points(self.group)
+            }
+        entry_point = self.plugins.get(name)
+        if entry_point is None:
+            return None
+        factory = entry_point.load()
+        if self.from_plugin is not None:
+            factory = self.from_plugin(factory)
+        super().__setitem__(name, factory)
+        return factory
+
+
+def _entry_points(group: str) -> list:
+    try:
+        from importlib import metadata
+    except ImportError:
+        try:
+            # python < 3.8
+            import importlib_metadata as metadata
+        except ImportError:
+            return []
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, ()))
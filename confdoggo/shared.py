@@ -0,0 +1,315 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Settings shared by several processes through a memory-mapped file.
+
+The first process calling `go_catch_shared` on a path becomes its owner:
+it fetches, validates and watches the configurations as usual, and
+publishes the validated settings into the file after every change. The
+other processes only map the file, and rebuild their settings when the
+version counter stored in it changes.
+
+The file starts with a header (magic, version, length of the data)
+followed by the pickled settings. The version is odd while the owner
+writes, so that readers can detect and retry torn reads (a seqlock).
+Like snapshots, the file must only be writable by trusted users.
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Iterable, Type, Union
+from pathlib import Path
+
+from . import core, snapshot
+from .utils import Configuration, DoggoException
+from .watchers import BaseWatcher
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"DOGGOSHM"
+HEADER = struct.Struct("<8sQQ")  # magic, version, length
+VERSION_OFFSET = 8
+LENGTH_OFFSET = 16
+INITIAL_SIZE = 64 * 1024
+
+
+class SharedSettingsException(DoggoException):
+    pass
+
+
+class SnapshotWriter:
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self.fd).st_size
+        if size < INITIAL_SIZE:
+            os.ftruncate(self.fd, INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self.map = mmap.mmap(self.fd, size)
+        magic, version, _ = HEADER.unpack_from(self.map)
+        # versions continue from the ones of a previous owner
+        self.version = version + version % 2 if magic == MAGIC else 0
+        # until the first write, readers find nothing published: not the
+        # settings left by a previous owner
+        self.map[: len(MAGIC)] = bytes(len(MAGIC))
+
+    def write(self, data: bytes):
+        size = HEADER.size + len(data)
+        if size > len(self.map):
+            # readers notice the larger length and map the file again
+            new_size = max(size, len(self.map) * 2)
+            os.ftruncate(self.fd, new_size)
+            self.map.close()
+            self.map = mmap.mmap(self.fd, new_size)
+        struct.pack_into("<Q", self.map, VERSION_OFFSET, self.version + 1)
+        self.map[: len(MAGIC)] = MAGIC
+        self.map[HEADER.size : size] = data
+        struct.pack_into("<Q", self.map, LENGTH_OFFSET, len(data))
+        self.version += 2
+        struct.pack_into("<Q", self.map, VERSION_OFFSET, self.version)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.path = path
+        self.map = None
+        self.version = 0
+
+    def remap(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < HEADER.size:
+                    return False
+                new_map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+        if self.map is not None:
+            self.map.close()
+        self.map = new_map
+        return True
+
+    def changed(self) -> bool:
+        # a single 8 bytes read: cheap enough to be polled often
+        if self.map is None and not self.remap():
+            return False
+        (version,) = struct.unpack_from("<Q", self.map, VERSION_OFFSET)
+        return version != self.version
+
+    def read(self, attempts=100):
+        """ Returns the data last written, or None if unchanged. """
+        for _ in range(attempts):
+            if not self.changed():
+                return None
+            magic, version, length = HEADER.unpack_from(self.map)
+            if magic != MAGIC:
+                # nothing published (yet) by the current owner
+                return None
+            if version % 2:
+                # being written
+                time.sleep(0.001)
+                continue
+            if HEADER.size + length > len(self.map):
+                self.remap()
+                continue
+            data = self.map[HEADER.size : HEADER.size + length]
+            (after,) = struct.unpack_from("<Q", self.map, VERSION_OFFSET)
+            if after == version:
+                self.version = version
+                return data
+        raise SharedSettingsException(f"could not read a consistent '{self.path}'.")
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class SharedSnapshotWatcher(BaseWatcher):
+    """ Polls the version of a shared file, in the processes not owning it. """
+
+    def __init__(self, url, callback, reader: SnapshotReader, polling_interval=0.1):
+        super().__init__(url, callback)
+        self.reader = reader
+        self.polling_interval = polling_interval
+        self.closing = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        while not self.closing.wait(self.polling_interval):
+            if self.reader.changed():
+                try:
+                    self.callback()
+                except Exception:
+                    logger.exception("Ignoring error while reading '%s'.", self.path)
+
+    def stop(self):
+        self.closing.set()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+        self.reader.close()
+
+
+# path -> writer, for the paths owned by this process
+writers: dict[str, SnapshotWriter] = {}
+
+
+def go_catch_shared(
+    settings_class: Type[core.Settings],
+    configurations: Iterable[Union[str, Path]],
+    path: Union[str, Path],
+    polling_interval=0.1,
+    timeout=10,
+    **options,
+) -> core.SettingsHandle:
+    """
+    Like `go_catch` in copy-on-write mode, but fetching and watching the
+    configurations in a single process, which shares the settings with
+    the others through the file at `path`.
+
+    `options` are passed to `go_catch` in the owning process. The other
+    processes check for changes every `polling_interval` seconds, and
+    wait up to `timeout` seconds for the owner to publish the settings.
+    """
+    path = str(path)
+    if _try_lock(path + ".lock"):
+        return _own(settings_class, configurations, path, options)
+    return attach(settings_class, path, polling_interval, timeout)
+
+
+def _try_lock(path: str) -> bool:
+    if fcntl is None:
+        raise SharedSettingsException("shared settings need fcntl (POSIX).")
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    # the lock is held, through its descriptor, for the life of the process
+    return True
+
+
+def _own(settings_class, configurations, path, options):
+    options["copy_on_write"] = True
+    # resets the file before fetching: the other processes wait for these
+    # settings rather than serve the ones of a previous owner
+    writer = SnapshotWriter(path)
+    try:
+        handle = core.go_catch(settings_class, configurations, **options)
+    except BaseException:
+        writer.close()
+        raise
+    manager = core.roots_registry[settings_class]
+    writers[path] = writer
+    publish = functools.partial(_publish, writer, manager)
+    publish()
+    manager.subscribe("", lambda changes: publish())
+    return handle
+
+
+def _publish(writer: SnapshotWriter, manager: core.RootSettingsManager):
+    settings = manager.root_settings
+    data = {
+        "schema": snapshot.schema_fingerprint(settings.__class__),
+        "settings": manager.tree if manager.tree is not None else settings.dict(),
+        "merged": manager.merged,
+    }
+    writer.write(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def attach(
+    settings_class: Type[core.Settings],
+    path: Union[str, Path],
+    polling_interval=0.1,
+    timeout=10,
+) -> core.SettingsHandle:
+    """
+    Settings published by the process owning `path`. Settings published
+    for another version of `settings_class`, e.g. left by a previous
+    deployment, are ignored until the owner publishes new ones.
+    """
+    path = str(path)
+    reader = SnapshotReader(path)
+    deadline = time.monotonic() + timeout
+    while True:
+        data = reader.read()
+        loaded = _load(settings_class, data) if data is not None else None
+        if loaded is not None:
+            break
+        if time.monotonic() > deadline:
+            raise SharedSettingsException(
+                f"no settings for '{settings_class.__qualname__}' were "
+                f"published to '{path}'."
+            )
+        time.sleep(0.01)
+    settings, merged = loaded
+    url = "shared://" + path
+    config = Configuration(url=url, parsed_content=merged)
+    manager = core.RootSettingsManager(
+        settings, collections.OrderedDict({url: config}), copy_on_write=True
+    )
+    core.roots_registry[settings_class] = manager
+    config.watcher = SharedSnapshotWatcher(
+        url,
+        functools.partial(_refresh, settings_class, manager, reader),
+        reader,
+        polling_interval,
+    )
+    config.watcher.start()
+    return manager.handle
+
+
+def _refresh(settings_class, manager: core.RootSettingsManager, reader):
+    data = reader.read()
+    if data is None:
+        return
+    loaded = _load(settings_class, data)
+    if loaded is None:
+        raise SharedSettingsException(
+            f"the settings were published for another version of "
+            f"'{settings_class.__qualname__}'."
+        )
+    manager.publish(*loaded)
+
+
+def _load(settings_class, data: bytes):
+    """ The settings and merged configuration, or None for another schema. """
+    data = pickle.loads(data)
+    if data["schema"] != snapshot.schema_fingerprint(settings_class):
+        return None
+    return snapshot.rebuild(settings_class, data["settings"]), data["merged"]
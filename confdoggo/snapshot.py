@@ -0,0 +1,253 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+On-disk snapshots of validated settings.
+
+A snapshot stores the validated settings together with the parsed
+content of every source, keyed on the source URLs, on the fingerprints
+recorded by their clients (e.g. a file's stat) and on a fingerprint of
+the `Settings` schema. While the key still matches, settings are
+loaded without fetching, parsing or validating anything.
+
+Snapshots are pickles: the snapshot directory must only be writable by
+trusted users.
+"""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Optional, Type, Union
+
+import pydantic
+import pydantic.fields
+from pydantic.utils import lenient_issubclass
+
+from . import clients
+from .__version__ import __version__
+from .utils import Configuration
+
+SNAPSHOT_FORMAT = 1
+
+_SEQUENCE_SHAPES = {
+    getattr(pydantic.fields, shape)
+    for shape in (
+        "SHAPE_LIST",
+        "SHAPE_SET",
+        "SHAPE_FROZENSET",
+        "SHAPE_TUPLE_ELLIPSIS",
+        "SHAPE_SEQUENCE",
+        "SHAPE_DEQUE",
+    )
+    if hasattr(pydantic.fields, shape)
+}
+_MAPPING_SHAPES = {
+    getattr(pydantic.fields, shape)
+    for shape in ("SHAPE_MAPPING", "SHAPE_DICT", "SHAPE_DEFAULTDICT")
+    if hasattr(pydantic.fields, shape)
+}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def schema_fingerprint(settings_class: Type[pydantic.BaseModel]) -> str:
+    fingerprint = settings_class.__dict__.get("__confdoggo_schema_fingerprint__")
+    if fingerprint is None:
+        fingerprint = _schema_fingerprint(settings_class)
+        # on the class itself, not inherited: subclasses have other fields
+        setattr(settings_class, "__confdoggo_schema_fingerprint__", fingerprint)
+    return fingerprint
+
+
+def _schema_fingerprint(settings_class: Type[pydantic.BaseModel]) -> str:
+    try:
+        schema = settings_class.schema_json(sort_keys=True)
+    except Exception:
+        # some field types cannot be represented in a JSON schema
+        schema = repr(
+            [(name, field) for name, field in settings_class.__fields__.items()]
+        )
+    identity = f"{settings_class.__module__}.{settings_class.__qualname__}"
+    return hashlib.blake2b(
+        "\n".join((str(__version__), identity, schema)).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+def snapshot_path(
+    directory: Union[str, Path], settings_class: Type[pydantic.BaseModel], urls
+) -> Path:
+    key = "\n".join(
+        (settings_class.__module__, settings_class.__qualname__, *urls)
+    ).encode("utf-8")
+    name = hashlib.blake2b(key, digest_size=16).hexdigest()
+    return Path(directory) / f"{name}.snapshot"
+
+
+def save(
+    directory: Union[str, Path],
+    settings_class: Type[pydantic.BaseModel],
+    settings: pydantic.BaseModel,
+    configurations: collections.OrderedDict[str, Configuration],
+) -> bool:
+    if any(config.fingerprint is None for config in configurations.values()):
+        # the sources could not be checked cheaply when loading
+        return False
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "schema": schema_fingerprint(settings_class),
+        "sources": [
+            (
+                url,
+                config.fingerprint,
+                config.digest,
+                config.mime_type,
+                config.parsed_content,
+            )
+            for url, config in configurations.items()
+        ],
+        "settings": settings.dict(),
+    }
+    path = snapshot_path(directory, settings_class, configurations)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # written aside and renamed, so that readers never see a partial file
+    fd, temporary = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, str(path))
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return True
+
+
+def load(
+    directory: Union[str, Path],
+    settings_class: Type[pydantic.BaseModel],
+    urls,
+) -> Optional[tuple]:
+    """
+    Returns the settings and the configurations stored in the snapshot
+    for `urls`, or None if there is no such snapshot or it is stale.
+    """
+    path = snapshot_path(directory, settings_class, urls)
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("format") != SNAPSHOT_FORMAT
+        or snapshot.get("schema") != schema_fingerprint(settings_class)
+        or [source[0] for source in snapshot["sources"]] != list(urls)
+    ):
+        return None
+    configurations = collections.OrderedDict()
+    for url, fingerprint, digest, mime_type, parsed_content in snapshot["sources"]:
+        client_type, client_url = url.split("://")
+        if clients.get_client(client_type).fingerprint(client_url) != fingerprint:
+            return None
+        configurations[url] = Configuration(
+            url=url,
+            mime_type=mime_type,
+            parsed_content=parsed_content,
+            digest=digest,
+            fingerprint=fingerprint,
+            settings_class=settings_class,
+        )
+    return rebuild(settings_class, snapshot["settings"]), configurations
+
+
+def rebuild(model_class: Type[pydantic.BaseModel], values: dict):
+    """
+    Settings from the values of already validated settings (as
+    exported by `dict()`), without validating them again if possible.
+    """
+    try:
+        return construct(model_class, values)
+    except _Unsupported:
+        return model_class.parse_obj(values)
+
+
+def construct(model_class: Type[pydantic.BaseModel], values: dict):
+    # rebuilds already validated values without validating them again
+    fields = {}
+    for name, kind, model in _plan(model_class):
+        if name not in values:
+            continue
+        value = values[name]
+        if kind is None or value is None:
+            fields[name] = value
+        elif kind is _MODEL:
+            fields[name] = construct(model, value)
+        elif kind is _SEQUENCE:
+            fields[name] = value.__class__(construct(model, item) for item in value)
+        elif kind is _MAPPING:
+            fields[name] = value.__class__(
+                (key, construct(model, item)) for key, item in value.items()
+            )
+        else:
+            # e.g. a union of models: which one was chosen is unknown
+            raise _Unsupported()
+    return model_class.construct(**fields)
+
+
+# how the values of a field are rebuilt, see `_plan`
+_MODEL = "model"
+_SEQUENCE = "sequence"
+_MAPPING = "mapping"
+_UNSUPPORTED = "unsupported"
+
+
+def _plan(model_class: Type[pydantic.BaseModel]) -> list:
+    # (name, kind, model) of each field, computed once per class
+    plan = model_class.__dict__.get("__confdoggo_snapshot_plan__")
+    if plan is None:
+        plan = [
+            (name, _kind(field), field.type_)
+            for name, field in model_class.__fields__.items()
+        ]
+        setattr(model_class, "__confdoggo_snapshot_plan__", plan)
+    return plan
+
+
+def _kind(field: pydantic.fields.ModelField) -> Optional[str]:
+    # None for values without models, kept as they are
+    if not _contains_model(field):
+        return None
+    if not lenient_issubclass(field.type_, pydantic.BaseModel):
+        return _UNSUPPORTED
+    if field.shape == pydantic.fields.SHAPE_SINGLETON:
+        return _MODEL
+    if field.shape in _SEQUENCE_SHAPES:
+        return _SEQUENCE
+    if field.shape in _MAPPING_SHAPES:
+        return _MAPPING
+    return _UNSUPPORTED
+
+
+def _contains_model(field: pydantic.fields.ModelField) -> bool:
+    if lenient_issubclass(field.type_, pydantic.BaseModel):
+        return True
+    return any(_contains_model(sub_field) for sub_field in field.sub_fields or ())
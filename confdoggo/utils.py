@@ -13,26 +13,60 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 from dataclasses import dataclass
 
 
 @dataclass
 class Configuration:
     url: str = None
+    # str or bytes, released once parsed
     content: str = None
     mime_type: str = None
     parsed_content: dict = None
+    # digest of `content`, used to skip unchanged reloads
+    digest: str = None
+    # cheap metadata check set by the client (e.g. a file's stat),
+    # compared before fetching the content again
+    fingerprint: tuple = None
+    # HTTP validators, sent back on the next fetch of the same url
+    etag: str = None
+    last_modified: str = None
+    # set by clients when the source reports it did not change
+    # since the validators above were obtained
+    not_modified: bool = False
+    # the documents making up a collection (e.g. a conf.d directory),
+    # in increasing order of importance, see the fragments module
+    fragments: list = None
+    # the settings the source is loaded for, needed by the sources
+    # that depend on their fields (e.g. environment variables)
+    settings_class: type = None
     watcher = None  # : watchers.BaseWatcher
 
+    def release_content(self):
+        self.content = None
+
+
+def content_digest(content) -> str:
+    if content is None:
+        return None
+    if isinstance(content, str):
+        content = content.encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
 
 class DoggoException(Exception):
     pass
 
 
 class MissingLibraryException(DoggoException):
-    def __init__(self, library, extras):
-        super().__init__(
-            f"missing library '{library}'. "
-            f"To install all the necessary components, "
-            f"run `pip install confdoggo[{extras}]`."
-        )
+    def __init__(self, library, extras=None):
+        if extras is None:
+            # not provided by any extra
+            hint = f"To install it, run `pip install {library}`."
+        else:
+            hint = (
+                f"To install all the necessary components, "
+                f"run `pip install confdoggo[{extras}]`."
+            )
+        super().__init__(f"missing library '{library}'. {hint}")
@@ -15,6 +15,7 @@
 
 import abc
 from typing import Callable
+from ..registry import Registry
 from ..utils import DoggoException
 
 
@@ -32,6 +33,31 @@ class BaseWatcher(abc.ABC):
     def stop(self):
         pass
 
+    def seed(self, config):
+        """
+        Called with the configuration fetched when watching starts, and
+        after every later fetch: watchers fetching the source themselves
+        (e.g. polling it) start from it, rather than fetch it again.
+        """
+
+    def take_fetched(self):
+        """
+        The configuration fetched along with the last change reported,
+        if any and not taken yet, which reloads use instead of fetching
+        the source again.
+        """
+        return None
+
+
+class StaticWatcher(BaseWatcher):
+    """ For sources that do not change while the process runs. """
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
 
 class UnknownWatcher(DoggoException):
     def __init__(self, watcher_name):
@@ -39,23 +65,42 @@ class UnknownWatcher(DoggoException):
         super().__init__(f"for URL protocol '{self.watcher_name}'.")
 
 
+def shutdown_hubs():
+    from . import hub
+
+    hub.shutdown_hubs()
+
+
 def fs_watcher():
     from . import fs
 
     return fs.get_watcher
 
 
-watchers_registry = {
-    "file": fs_watcher,
-    # TODO
-    # 'http': ['http', 'HttpClient'],
-    # 'https': ['https', 'HttpsClient'],
-    # 'ftp': ['ftp', 'FtpClient'],
-}
+def http_watcher():
+    from . import http
+
+    return http.get_watcher
+
+
+watchers_registry = Registry(
+    "confdoggo.watchers",
+    {
+        "file": fs_watcher,
+        "http": http_watcher,
+        "https": http_watcher,
+        "env": lambda: StaticWatcher,
+        "argv": lambda: StaticWatcher,
+        # TODO
+        # 'ftp': ['ftp', 'FtpClient'],
+    },
+    # plugins provide the watcher class itself
+    from_plugin=lambda watcher_class: lambda: watcher_class,
+)
 
 
 def get_watcher(watcher_type: str):
     try:
-        return watchers_registry[watcher_type]()
+        return watchers_registry.instance(watcher_type)
     except KeyError:
         raise UnknownWatcher(watcher_type)
@@ -13,9 +13,20 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import annotations
+
+import itertools
 import os
 import threading
+import time
 from . import BaseWatcher
+from .hub import WatcherHub, get_hub
+from ..clients.fs import (
+    FileSystemClient,
+    collection_matcher,
+    collection_root,
+    is_collection,
+)
 
 
 try:
@@ -28,56 +39,293 @@ except ImportError:
     has_watchdog = False
 
 
-class FileSystemOSWatcher(BaseWatcher):
-    """ Dependant on available OS functionality. """
+class FileSystemOSHub(WatcherHub):
+    """
+    Dependant on available OS functionality.
 
-    def __init__(self, url, callback):
-        super().__init__(url, callback)
+    A single observer watches the directories of all the subscribed
+    files, each directory being scheduled once. Collections (directories
+    and glob patterns) are watched through the directory they are in.
+    """
+
+    def __init__(self):
+        super().__init__()
         self.observer = watchdog.observers.Observer()
-        self.event_handler = watchdog.events.FileModifiedEvent(self.path)
-        self.event_handler.dispatch = lambda _: self.callback()
-        self.observer.schedule(self.event_handler, self.path, recursive=False)
+        self.event_handler = watchdog.events.FileSystemEventHandler()
+        self.event_handler.on_any_event = self.on_any_event
+        # (directory, recursive) -> [scheduled watch, number of watched keys]
+        self.directories = {}
+        # collection -> whether a file belongs to it. replaced rather
+        # than modified, so that the observer's thread needs no lock
+        self.collections = {}
+
+    @staticmethod
+    def watched_directory(key) -> tuple:
+        if is_collection(key):
+            return collection_root(key)
+        return os.path.dirname(key), False
+
+    def watch(self, key):
+        if is_collection(key):
+            self.collections = {**self.collections, key: collection_matcher(key)}
+        directory = self.watched_directory(key)
+        if directory in self.directories:
+            self.directories[directory][1] += 1
+        else:
+            watch = self.observer.schedule(
+                self.event_handler, directory[0], recursive=directory[1]
+            )
+            self.directories[directory] = [watch, 1]
+
+    def unwatch(self, key):
+        directory = self.watched_directory(key)
+        if key in self.collections:
+            self.collections = {
+                other: matcher
+                for other, matcher in self.collections.items()
+                if other != key
+            }
+        self.directories[directory][1] -= 1
+        if not self.directories[directory][1]:
+            watch, _ = self.directories.pop(directory)
+            self.observer.unschedule(watch)
+
+    # reading a file also produces events (e.g. opened), which must
+    # not be reported. deleted files are reported once created again,
+    # unless they belong to a collection, which they are removed from.
+    reported_events = {"created", "modified", "moved", "closed"}
+    collection_events = reported_events | {"deleted"}
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in self.collection_events:
+            return
+        reported = event.event_type in self.reported_events
+        paths = {event.src_path, getattr(event, "dest_path", None)}
+        changed = set()
+        for path in paths:
+            if not path:
+                continue
+            path = os.path.abspath(path)
+            if reported and path in self.subscriptions:
+                changed.add(path)
+            for key, matcher in self.collections.items():
+                if matcher(path):
+                    changed.add(key)
+        for key in changed:
+            self.dispatch(key)
 
     def start(self):
+        if self.observer.ident is not None:
+            # observers cannot be restarted
+            self.observer = watchdog.observers.Observer()
+            for (directory, recursive), state in self.directories.items():
+                state[0] = self.observer.schedule(
+                    self.event_handler, directory, recursive=recursive
+                )
         self.observer.start()
+        return self.observer
 
-    def stop(self):
-        self.observer.stop()
-        self.observer.join()
+    def stop(self, observer):
+        observer.stop()
+        if observer is not threading.current_thread():
+            observer.join()
 
 
-class FileSystemPollWatcher(BaseWatcher):
-    def __init__(self, url, callback, polling_interval=5):
-        self.polling_interval = polling_interval
-        self.closing = threading.Event()
-        self.thread = threading.Thread(target=self.run)
-        super().__init__(url, callback)
+class PolledFile:
+    __slots__ = ("fingerprint", "interval", "due")
+
+    def __init__(self, fingerprint, interval):
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self.due = time.monotonic() + interval
+
+
+class FileSystemPollHub(WatcherHub):
+    """
+    One thread polling the stat of all the subscribed files.
+
+    Files are grouped by directory, and each directory is checked in a
+    single sweep. A file is found changed when its modification time,
+    size or inode changes (e.g. when replaced by a rename). Polls of a
+    file tighten to `min_interval` seconds after a change, and back off
+    by `backoff` up to `max_interval` seconds while it is quiet.
+
+    Collections (directories and glob patterns) are polled as a whole,
+    through the fingerprints of all their files.
+    """
+
+    # directories with at least this many watched files
+    # are listed, rather than stat-ed file by file.
+    scandir_threshold = 4
+
+    def __init__(self, min_interval=0.5, max_interval=5, backoff=2):
+        super().__init__()
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.thread = None
+        # directory -> file name -> PolledFile
+        self.directories: dict[str, dict[str, PolledFile]] = {}
+        self.collections: dict[str, PolledFile] = {}
+        self.client = FileSystemClient()
+
+    def watch(self, key):
+        if is_collection(key):
+            polled = PolledFile(self.client.fingerprint(key), self.min_interval)
+            self.collections[key] = polled
+            return
+        directory, name = os.path.split(key)
+        files = self.directories.setdefault(directory, {})
+        files[name] = PolledFile(self.fingerprint(key), self.min_interval)
+
+    def unwatch(self, key):
+        if self.collections.pop(key, None) is not None:
+            return
+        directory, name = os.path.split(key)
+        files = self.directories.get(directory, {})
+        files.pop(name, None)
+        if not files:
+            self.directories.pop(directory, None)
+
+    @staticmethod
+    def fingerprint(path):
+        try:
+            return FileSystemClient.stat_fingerprint(os.stat(path))
+        except OSError:
+            # file no longer exists or is inaccessible
+            return None
+
+    @staticmethod
+    def entry_fingerprint(entry: os.DirEntry):
+        try:
+            return FileSystemClient.stat_fingerprint(entry.stat())
+        except OSError:
+            return None
+
+    def sweep(self, directory, names) -> dict:
+        """ The fingerprints of the files `names` of `directory`. """
+        if len(names) < self.scandir_threshold:
+            return {
+                name: self.fingerprint(os.path.join(directory, name)) for name in names
+            }
+        fingerprints = dict.fromkeys(names)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name in fingerprints:
+                        fingerprints[entry.name] = self.entry_fingerprint(entry)
+        except OSError:
+            # e.g. the directory was removed: its files are missing
+            pass
+        return fingerprints
 
     def start(self):
+        closing = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(closing,), daemon=True)
         self.thread.start()
+        return self.thread, closing
+
+    def run(self, closing: threading.Event):
+        timeout = self.min_interval
+        while not closing.wait(timeout):
+            now = time.monotonic()
+            with self.lock:
+                due = [
+                    (directory, list(files))
+                    for directory, files in self.directories.items()
+                    if any(polled.due <= now for polled in files.values())
+                ]
+                due_collections = [
+                    key for key, polled in self.collections.items() if polled.due <= now
+                ]
+            for directory, names in due:
+                # stat-ed without holding the lock
+                fingerprints = self.sweep(directory, names)
+                for key in self.update(directory, fingerprints):
+                    self.dispatch(key)
+            if due_collections:
+                fingerprints = {
+                    key: self.client.fingerprint(key) for key in due_collections
+                }
+                for key in self.update_collections(fingerprints):
+                    self.dispatch(key)
+            with self.lock:
+                next_due = min(
+                    itertools.chain(
+                        (
+                            polled.due
+                            for files in self.directories.values()
+                            for polled in files.values()
+                        ),
+                        (polled.due for polled in self.collections.values()),
+                    ),
+                    default=time.monotonic() + self.max_interval,
+                )
+            timeout = max(0, next_due - time.monotonic())
+
+    def update(self, directory, fingerprints) -> list:
+        changed = []
+        now = time.monotonic()
+        with self.lock:
+            files = self.directories.get(directory, {})
+            for name, fingerprint in fingerprints.items():
+                polled = files.get(name)
+                if polled is None:
+                    # unsubscribed in the meantime
+                    continue
+                # a deleted file is reported once it is created again
+                if self.poll(polled, fingerprint, now) and fingerprint is not None:
+                    changed.append(os.path.join(directory, name))
+        return changed
 
-    def run(self):
-        last_modified = os.path.getmtime(self.path)
-        while not self.closing.is_set():
-            try:
-                # print('checking', self.path, last_modified, os.path.getmtime(self.path))
-                if os.path.getmtime(self.path) != last_modified:
-                    # print('callback')
-                    self.callback()
-                    last_modified = os.path.getmtime(self.path)
-            except OSError:
-                # file no longer exists or is inaccessible
-                self.callback()
-                break
-            self.closing.wait(self.polling_interval)
+    def update_collections(self, fingerprints) -> list:
+        now = time.monotonic()
+        with self.lock:
+            return [
+                key
+                for key, fingerprint in fingerprints.items()
+                if key in self.collections
+                and self.poll(self.collections[key], fingerprint, now)
+            ]
+
+    def poll(self, polled: PolledFile, fingerprint, now) -> bool:
+        """ Records a poll of `polled`, returns whether it changed. """
+        changed = fingerprint != polled.fingerprint
+        if changed:
+            polled.fingerprint = fingerprint
+            polled.interval = self.min_interval
+        else:
+            polled.interval = min(polled.interval * self.backoff, self.max_interval)
+        polled.due = now + polled.interval
+        return changed
+
+    def stop(self, started):
+        thread, closing = started
+        closing.set()
+        if thread is not threading.current_thread():
+            thread.join()
+
+
+class FileSystemWatcher(BaseWatcher):
+    def __init__(self, url, callback, hub: WatcherHub):
+        super().__init__(url, callback)
+        self.hub = hub
+        self.key = os.path.abspath(self.path)
+
+    def start(self):
+        self.hub.subscribe(self.key, self.callback)
 
     def stop(self):
-        self.closing.set()
-        self.thread.join()
+        self.hub.unsubscribe(self.key, self.callback)
 
 
 def get_watcher(url, callback, polling_interval=5):
     if has_watchdog:
-        return FileSystemOSWatcher(url, callback)
+        hub = get_hub("file", FileSystemOSHub)
     else:
-        return FileSystemPollWatcher(url, callback, polling_interval)
+        hub = get_hub("file", lambda: FileSystemPollHub(max_interval=polling_interval))
+        # quiet files are polled at least every `polling_interval` seconds
+        with hub.lock:
+            hub.max_interval = min(hub.max_interval, polling_interval)
+            hub.min_interval = min(hub.min_interval, hub.max_interval)
+    return FileSystemWatcher(url, callback, hub)
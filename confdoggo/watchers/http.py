@@ -0,0 +1,273 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import threading
+import time
+from . import BaseWatcher
+from .hub import WatcherHub, get_hub
+from ..clients import http as http_client
+from ..utils import Configuration, content_digest
+
+logger = logging.getLogger(__name__)
+
+# a long poll answered after at least this fraction of the wait
+# was held by the server, rather than ignored
+HELD_FRACTION = 0.9
+
+
+class PolledSource:
+    def __init__(self, url, min_interval, max_interval, backoff, long_poll):
+        self.url = url
+        self.scheme, rest = url.split("://")
+        self.host, _, path = rest.partition("/")
+        self.path = "/" + path
+        self.configure(min_interval, max_interval, backoff, long_poll)
+        self.interval = min_interval
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        self.checked = False
+        # the content of the last change, until a reload takes it
+        self.fetched = None
+        self.checking = False
+        # whether the server held the last long poll until it was over
+        # or the source changed: only then is it sent again right away
+        self.held = False
+
+    def configure(self, min_interval, max_interval, backoff, long_poll):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        # seconds the server is asked to hold the request until a change
+        self.long_poll = long_poll
+
+    def seed(self, config: Configuration):
+        # the content as fetched elsewhere: only checked for changes
+        self.etag = config.etag
+        self.last_modified = config.last_modified
+        self.digest = config.digest
+        self.checked = True
+
+    def check(self, pool: http_client.ConnectionPool) -> bool:
+        """ Returns whether the source changed since the last check. """
+        headers = {"Accept-Encoding": "identity"}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        timeout = None
+        long_poll = self.long_poll and self.checked
+        if long_poll:
+            # RFC 7240: servers supporting it answer as soon as the
+            # resource changes, or with a 304 once the wait is over.
+            headers["Prefer"] = f"wait={self.long_poll:g}"
+            timeout = self.long_poll + pool.timeout
+        self.held = False
+        start = time.monotonic()
+        response, body = pool.request(
+            self.scheme, self.host, "GET", self.path, headers, timeout
+        )
+        held = long_poll and time.monotonic() - start >= self.long_poll * HELD_FRACTION
+        if response.status == 304:
+            self.held = held
+            return False
+        if response.status != 200:
+            raise http_client.HttpException(self.url, response.status, response.reason)
+        config = Configuration(url=self.url)
+        http_client.HttpClient.read(config, response, body, self.path)
+        config.digest = content_digest(config.content)
+        changed = self.checked and config.digest != self.digest
+        if changed:
+            self.fetched = config
+        self.etag = config.etag
+        self.last_modified = config.last_modified
+        self.digest = config.digest
+        self.checked = True
+        # a change answered during the wait is as good as a held request
+        self.held = held or (long_poll and changed)
+        return changed
+
+    def next_interval(self, changed: bool, failed=False) -> float:
+        # polls tighten after a change and back off while the source is
+        # quiet or cannot be reached
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        if self.held and not failed:
+            return 0
+        return self.interval
+
+
+class HttpPollHub(WatcherHub):
+    """
+    One scheduler thread for all the polled URLs; the requests
+    themselves are made by a bounded pool of workers.
+    """
+
+    def __init__(
+        self,
+        max_workers=4,
+        min_interval=1,
+        max_interval=60,
+        backoff=2,
+        long_poll=None,
+        connection_pool: http_client.ConnectionPool = None,
+    ):
+        super().__init__()
+        self.max_workers = max_workers
+        self.defaults = (min_interval, max_interval, backoff, long_poll)
+        self.pool = connection_pool or http_client.ConnectionPool(max_idle=max_workers)
+        self.sources = {}
+        self.schedule = []  # heap of (due, sequence, url)
+        self.sequence = itertools.count()
+        self.wakeup = threading.Condition(self.lock)
+
+    def watch(self, key):
+        self.sources[key] = PolledSource(key, *self.defaults)
+        self.reschedule(key, 0)
+
+    def unwatch(self, key):
+        self.sources.pop(key, None)
+
+    def configure(self, key, min_interval, max_interval, backoff, long_poll):
+        with self.lock:
+            self.sources[key].configure(min_interval, max_interval, backoff, long_poll)
+
+    def seed(self, key, config: Configuration):
+        with self.lock:
+            source = self.sources.get(key)
+            if source is not None:
+                source.seed(config)
+
+    def take_fetched(self, key):
+        with self.lock:
+            source = self.sources.get(key)
+            if source is None:
+                return None
+            fetched, source.fetched = source.fetched, None
+            return fetched
+
+    def reschedule(self, key, delay):
+        due = time.monotonic() + delay
+        heapq.heappush(self.schedule, (due, next(self.sequence), key))
+        self.wakeup.notify()
+
+    def start(self):
+        closing = threading.Event()
+        executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        thread = threading.Thread(
+            target=self.run, args=(closing, executor), daemon=True
+        )
+        thread.start()
+        return thread, closing, executor
+
+    def run(self, closing: threading.Event, executor):
+        with self.lock:
+            while not closing.is_set():
+                if not self.schedule:
+                    self.wakeup.wait()
+                    continue
+                due, _, key = self.schedule[0]
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self.wakeup.wait(remaining)
+                    continue
+                heapq.heappop(self.schedule)
+                source = self.sources.get(key)
+                if source is None or source.checking:
+                    continue
+                source.checking = True
+                executor.submit(self.check, key, source)
+
+    def check(self, key, source: PolledSource):
+        changed = failed = False
+        try:
+            changed = source.check(self.pool)
+        except Exception:
+            # e.g. the server is unreachable: retried after backing off
+            failed = True
+            logger.warning("Could not check '%s'.", source.url, exc_info=True)
+        delay = source.next_interval(changed, failed)
+        with self.lock:
+            source.checking = False
+            # unless unwatched meanwhile
+            if self.sources.get(key) is source:
+                self.reschedule(key, delay)
+        if changed:
+            self.dispatch(key)
+
+    def stop(self, started):
+        thread, closing, executor = started
+        with self.lock:
+            closing.set()
+            if self.running is None:
+                # not started again meanwhile
+                self.schedule.clear()
+            self.wakeup.notify_all()
+        if thread is not threading.current_thread():
+            thread.join()
+        # requests in flight (e.g. long polls) are not waited for
+        executor.shutdown(wait=False)
+        self.pool.clear()
+
+
+class HttpWatcher(BaseWatcher):
+    def __init__(self, url, callback, hub: HttpPollHub, **options):
+        super().__init__(url, callback)
+        self.hub = hub
+        self.options = options
+        self.seeded = None
+
+    def start(self):
+        # the first poll waits for the lock: it is configured and seeded
+        with self.hub.lock:
+            self.hub.subscribe(self.url, self.callback)
+            if self.options:
+                min_interval, max_interval, backoff, long_poll = self.hub.defaults
+                self.hub.configure(
+                    self.url,
+                    self.options.get("min_interval", min_interval),
+                    self.options.get("max_interval", max_interval),
+                    self.options.get("backoff", backoff),
+                    self.options.get("long_poll", long_poll),
+                )
+            if self.seeded is not None:
+                self.hub.seed(self.url, self.seeded)
+
+    def stop(self):
+        self.hub.unsubscribe(self.url, self.callback)
+
+    def seed(self, config):
+        self.seeded = config
+        self.hub.seed(self.url, config)
+
+    def take_fetched(self):
+        return self.hub.take_fetched(self.url)
+
+
+def get_watcher(url, callback, **options):
+    """
+    Options are `min_interval` and `max_interval` (seconds between two
+    polls), `backoff` (the factor by which the interval grows while the
+    source does not change), and `long_poll` (seconds the server is asked
+    to hold a request until the source changes).
+    """
+    hub = get_hub("http", HttpPollHub)
+    return HttpWatcher(url, callback, hub, **options)
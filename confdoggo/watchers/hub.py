@@ -0,0 +1,123 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import abc
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class WatcherHub(abc.ABC):
+    """
+    Process-wide backend shared by all the watchers of a kind.
+
+    The hub owns the resources needed to watch (threads, observers,
+    OS handles) and dispatches events to the callbacks subscribed to a
+    key, so that watching many sources does not cost one backend each.
+    The hub is started on the first subscription and stopped when the
+    last one is removed.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.subscriptions: dict[str, list[Callable]] = {}
+        # what `start` returned, while the hub is started
+        self.running = None
+
+    def subscribe(self, key: str, callback: Callable):
+        with self.lock:
+            if key not in self.subscriptions:
+                self.subscriptions[key] = []
+                self.watch(key)
+            self.subscriptions[key].append(callback)
+            if self.running is None:
+                self.running = self.start()
+
+    def unsubscribe(self, key: str, callback: Callable):
+        with self.lock:
+            callbacks = self.subscriptions.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if key in self.subscriptions and not callbacks:
+                del self.subscriptions[key]
+                self.unwatch(key)
+            stopping = None
+            if not self.subscriptions:
+                stopping, self.running = self.running, None
+        # stopping joins the hub's threads, which may be waiting for the
+        # lock. the hub may be started again meanwhile: only what was
+        # started before is stopped.
+        if stopping is not None:
+            self.stop(stopping)
+
+    def dispatch(self, key: str):
+        with self.lock:
+            callbacks = list(self.subscriptions.get(key, ()))
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                # a failing callback must not stop the
+                # hub from serving the other subscribers
+                logger.exception("Error while handling a change of '%s'.", key)
+
+    def shutdown(self):
+        with self.lock:
+            for key in self.subscriptions:
+                self.unwatch(key)
+            self.subscriptions.clear()
+            stopping, self.running = self.running, None
+        if stopping is not None:
+            self.stop(stopping)
+
+    @abc.abstractmethod
+    def watch(self, key: str):
+        pass
+
+    @abc.abstractmethod
+    def unwatch(self, key: str):
+        pass
+
+    @abc.abstractmethod
+    def start(self) -> object:
+        """ Returns what was started, which is given to `stop`. """
+
+    @abc.abstractmethod
+    def stop(self, started: object):
+        pass
+
+
+hubs: dict[str, WatcherHub] = {}
+_hubs_lock = threading.Lock()
+
+
+def get_hub(name: str, factory: Callable[[], WatcherHub]) -> WatcherHub:
+    with _hubs_lock:
+        try:
+            return hubs[name]
+        except KeyError:
+            hub = hubs[name] = factory()
+            return hub
+
+
+def shutdown_hubs():
+    with _hubs_lock:
+        running = list(hubs.values())
+    for hub in running:
+        hub.shutdown()
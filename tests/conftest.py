@@ -0,0 +1,143 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import functools
+import http.server
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import confdoggo
+from confdoggo import core
+from confdoggo.clients import BaseClient, clients_registry
+from confdoggo.watchers import BaseWatcher, watchers_registry
+
+
+@pytest.fixture(autouse=True)
+def isolated():
+    """ Every test starts without roots, sources or watchers. """
+    yield
+    confdoggo.shutdown_watchers()
+    core.roots_registry.clear()
+    core.sources.sources.clear()
+
+
+@pytest.fixture
+def write(tmp_path):
+    """ Writes a JSON document, optionally old enough to be fingerprinted. """
+
+    def write(name, document, old=True):
+        path = tmp_path / name
+        path.write_text(json.dumps(document))
+        if old:
+            past = time.time() - 60
+            os.utime(str(path), (past, past))
+        return str(path)
+
+    return write
+
+
+class FakeClient(BaseClient):
+    """ Serves `documents` by path for fake:// URLs. """
+
+    remote = True
+
+    def __init__(self):
+        self.documents = {}
+        self.fetches = collections.Counter()
+        # slows down or fails the next fetches
+        self.delay = 0
+        self.error = None
+        # the watchers started for fake:// URLs
+        self.watchers = []
+
+    def go_catch(self, config, url):
+        self.fetches[url] += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        document = self.documents[url]
+        # str documents are served as they are, e.g. invalid JSON
+        if not isinstance(document, str):
+            document = json.dumps(document)
+        config.content = document
+        config.mime_type = "application/json"
+
+
+class FakeWatcher(BaseWatcher):
+    """ Reports changes when told to, from a thread of its own. """
+
+    def __init__(self, url, callback, client):
+        super().__init__(url, callback)
+        self.client = client
+        self.events = []
+
+    def start(self):
+        self.client.watchers.append(self)
+
+    def fire(self):
+        event = threading.Thread(target=self.callback, daemon=True)
+        self.events.append(event)
+        event.start()
+
+    def stop(self):
+        # like the hubs, waits for the events being reported
+        for event in self.events:
+            event.join()
+
+
+@pytest.fixture
+def fake():
+    client = FakeClient()
+    clients_registry["fake"] = lambda: client
+    watchers_registry["fake"] = lambda: functools.partial(FakeWatcher, client=client)
+    yield client
+    # while fake:// URLs can still be resolved
+    confdoggo.shutdown_watchers()
+    del clients_registry["fake"]
+    del watchers_registry["fake"]
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    # keeps connections open, as most servers do
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_url(tmp_path):
+    """ The URL of a server of the files in tmp_path. """
+    handler = functools.partial(_QuietHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
@@ -0,0 +1,125 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import time
+
+import pytest
+
+import confdoggo
+from confdoggo import core, instrumentation
+from confdoggo.cache import SourceCache
+
+from .conftest import wait_for
+
+
+class Settings(confdoggo.Settings):
+    value: int = 0
+
+
+@pytest.fixture
+def caches():
+    made = []
+
+    def cache(**options):
+        made.append(SourceCache(**options))
+        return made[-1]
+
+    yield cache
+    for cache in made:
+        cache.shutdown()
+
+
+def load(cache):
+    return confdoggo.go_catch(Settings, ["fake://a"], source_cache=cache)
+
+
+def test_stale_versions_are_served_while_revalidating(fake, caches):
+    cache = caches(max_stale=60)
+    fake.documents["a"] = {"value": 1}
+    assert load(cache).value == 1
+    fake.documents["a"] = {"value": 2}
+    fake.delay = 0.5
+    start = time.monotonic()
+    settings = load(cache)
+    assert settings.value == 1
+    assert time.monotonic() - start < 0.4
+    # reloaded once fetched again
+    assert wait_for(lambda: settings.value == 2)
+
+
+def test_versions_older_than_max_stale_are_fetched_again(fake, caches):
+    cache = caches(max_stale=0, deadline=5)
+    fake.documents["a"] = {"value": 1}
+    assert load(cache).value == 1
+    fake.documents["a"] = {"value": 2}
+    fake.delay = 0.1
+    assert load(cache).value == 2
+    assert fake.fetches["a"] == 2
+
+
+def test_stale_versions_are_served_past_the_deadline(fake, caches, caplog):
+    cache = caches(max_stale=0, deadline=0.1)
+    fake.documents["a"] = {"value": 1}
+    assert load(cache).value == 1
+    fake.documents["a"] = {"value": 2}
+    fake.delay = 1
+    start = time.monotonic()
+    with caplog.at_level(logging.WARNING, "confdoggo.cache"):
+        settings = load(cache)
+    assert settings.value == 1
+    assert time.monotonic() - start < 0.8
+    assert "takes too long" in caplog.text
+    assert wait_for(lambda: settings.value == 2)
+
+
+def test_stale_versions_are_served_when_fetching_fails(fake, caches):
+    cache = caches(max_stale=0)
+    fake.documents["a"] = {"value": 1}
+    assert load(cache).value == 1
+    fake.error = ConnectionError()
+    assert load(cache).value == 1
+
+
+class Failures(instrumentation.Instrument):
+    def __init__(self):
+        self.reasons = []
+
+    def count(self, event, value, tags):
+        if event == "reload_failed":
+            self.reasons.append(tags["reason"])
+
+
+@pytest.fixture
+def failures():
+    instrument = Failures()
+    instrumentation.add_instrument(instrument)
+    yield instrument.reasons
+    instrumentation.remove_instrument(instrument)
+
+
+def test_reload_failures_are_labelled(fake, failures):
+    fake.documents["a"] = {"value": 1}
+    settings = confdoggo.go_catch(Settings, ["fake://a"])
+    manager = core.roots_registry[Settings]
+    fake.error = ConnectionError()
+    manager.reload(["fake://a"])
+    fake.error = None
+    fake.documents["a"] = "{"
+    manager.reload(["fake://a"])
+    fake.documents["a"] = {"value": "x"}
+    manager.reload(["fake://a"])
+    assert failures == ["fetch", "parse", "validation"]
+    assert settings.value == 1
@@ -0,0 +1,65 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import confdoggo
+from confdoggo import core
+
+from .conftest import wait_for
+
+
+class Settings(confdoggo.Settings):
+    a: int = 0
+    b: int = 0
+
+
+def watched(fake, debounce):
+    fake.documents["a"] = {"a": 1}
+    fake.documents["b"] = {"b": 1}
+    settings = confdoggo.go_catch(
+        Settings, ["fake://a", "fake://b"], watch=True, debounce=debounce
+    )
+    manager = core.roots_registry[Settings]
+    reloads = []
+    reload = manager.reload
+    manager.reload = lambda urls: reloads.append(sorted(urls)) or reload(urls)
+    return settings, manager, reloads
+
+
+def test_events_are_reloaded_at_once(fake):
+    settings, manager, reloads = watched(fake, debounce=0.2)
+    fake.documents["a"] = {"a": 2}
+    fake.documents["b"] = {"b": 2}
+    for _ in range(5):
+        for watcher in fake.watchers:
+            watcher.fire()
+    wait_for(lambda: (settings.a, settings.b) == (2, 2))
+    time.sleep(0.3)
+    assert reloads == [["fake://a", "fake://b"]]
+    assert fake.fetches == {"a": 2, "b": 2}
+
+
+def test_shutdown_during_the_debounce_window(fake):
+    settings, manager, reloads = watched(fake, debounce=5)
+    fake.documents["a"] = {"a": 2}
+    fake.watchers[0].fire()
+    wait_for(lambda: manager.pending)
+    reloader = manager.reloader
+    started = time.monotonic()
+    confdoggo.shutdown_watchers()
+    assert time.monotonic() - started < 1
+    assert not reloader.is_alive()
+    assert reloads == [] and settings.a == 1
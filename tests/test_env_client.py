@@ -0,0 +1,118 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Dict, List
+
+import pydantic
+import pytest
+
+import confdoggo
+from confdoggo.clients import clients_registry
+from confdoggo.clients.env import ArgvClient, EnvironmentClient, UnboundSource
+from confdoggo.utils import Configuration
+
+
+class Server(confdoggo.Settings):
+    host: str = "localhost"
+    port: int = 8080
+
+
+class Settings(confdoggo.Settings):
+    server: Server = Server()
+    debug: bool = False
+    tags: List[str] = []
+    limits: Dict[str, int] = {}
+    log_level: str = pydantic.Field("info", alias="logLevel")
+
+
+def parsed(client, url):
+    config = Configuration(url=url, settings_class=Settings)
+    client.go_catch(config, url.split("://")[1])
+    return config.parsed_content
+
+
+def test_variables(monkeypatch):
+    monkeypatch.setenv("APP_SERVER__PORT", "9000")
+    monkeypatch.setenv("APP_TAGS", '["a", "b"]')
+    monkeypatch.setenv("APP_LIMITS", "not JSON")
+    monkeypatch.setenv("APP_LOGLEVEL", "debug")
+    monkeypatch.setenv("APP_UNKNOWN", "1")
+    monkeypatch.setenv("OTHER_DEBUG", "true")
+    assert parsed(EnvironmentClient(), "env://APP_") == {
+        "server": {"port": "9000"},
+        "tags": ["a", "b"],
+        # left for validation to report
+        "limits": "not JSON",
+        "logLevel": "debug",
+    }
+
+
+def test_variables_override_other_sources(monkeypatch, write):
+    monkeypatch.setenv("APP_SERVER__HOST", "example.com")
+    monkeypatch.setenv("APP_LIMITS", '{"a": 1}')
+    path = write("settings.json", {"server": {"port": 1, "host": "localhost"}})
+    settings = confdoggo.go_catch(Settings, [path, "env://APP_"])
+    assert settings.server == Server(host="example.com", port=1)
+    assert settings.limits == {"a": 1}
+
+
+def test_options():
+    arguments = [
+        "run",
+        "--server.port",
+        "9000",
+        "--server.host=example.com",
+        "--debug",
+        "--log-level=x",
+        "--logLevel=debug",
+        "--tags",
+        '["a"]',
+        "--",
+        "--limits={}",
+    ]
+    assert parsed(ArgvClient(arguments), "argv://") == {
+        "server": {"port": "9000", "host": "example.com"},
+        "debug": "true",
+        "logLevel": "debug",
+        "tags": ["a"],
+    }
+
+
+def test_options_with_a_prefix():
+    arguments = ["--server.port=1", "--app.server.port=2", "--app.debug", "--appdebug"]
+    assert parsed(ArgvClient(arguments), "argv://app") == {
+        "server": {"port": "2"},
+        "debug": "true",
+    }
+
+
+def test_options_without_a_value_are_ignored():
+    assert parsed(ArgvClient(["--debug=false", "--server.port"]), "argv://") == {
+        "debug": "false"
+    }
+
+
+def test_options_override_other_sources(monkeypatch, write):
+    client = ArgvClient(["--server.port=9000", "--debug"])
+    monkeypatch.setitem(clients_registry, "argv", lambda: client)
+    path = write("settings.json", {"server": {"port": 1}})
+    settings = confdoggo.go_catch(Settings, [path, "argv://"])
+    assert settings.server.port == 9000
+    assert settings.debug is True
+
+
+def test_sources_need_a_settings_class():
+    with pytest.raises(UnboundSource):
+        EnvironmentClient().go_catch(Configuration(url="env://APP_"), "APP_")
@@ -0,0 +1,88 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import time
+
+import confdoggo
+from confdoggo import core
+
+from .conftest import wait_for
+
+
+class Settings(confdoggo.Settings):
+    a: int = 0
+    b: int = 0
+    c: int = 0
+
+
+def test_fragments_are_merged_in_the_order_of_their_names(tmp_path, write):
+    (tmp_path / "conf.d").mkdir()
+    write("conf.d/50-site.json", {"b": 2, "c": 2})
+    write("conf.d/10-defaults.json", {"a": 1, "b": 1, "c": 1})
+    write("conf.d/90-local.json", {"c": 3})
+    write("conf.d/.hidden.json", {"a": 4})
+    write("conf.d/notes.txt", "not a configuration")
+    settings = confdoggo.go_catch(Settings, [str(tmp_path / "conf.d")])
+    assert (settings.a, settings.b, settings.c) == (1, 2, 3)
+    glob = confdoggo.go_catch(Settings, [str(tmp_path / "conf.d" / "[15]*.json")])
+    assert (glob.a, glob.b, glob.c) == (1, 2, 2)
+
+
+def test_unchanged_fragments_are_reused(tmp_path, write, monkeypatch):
+    (tmp_path / "conf.d").mkdir()
+    write("conf.d/10-a.json", {"a": 1})
+    write("conf.d/20-b.json", {"b": 1})
+    write("conf.d/30-c.json", {"c": 1})
+    settings = confdoggo.go_catch(Settings, [str(tmp_path / "conf.d")])
+    manager = core.roots_registry[Settings]
+    (config,) = manager.configurations.values()
+    before = config.fragments
+    parsed = []
+    parse = core._parse
+    monkeypatch.setattr(
+        core, "_parse", lambda config: parsed.append(config.url) or parse(config)
+    )
+    write("conf.d/20-b.json", {"b": 2}, old=False)
+    # touched, but not modified
+    os.utime(str(tmp_path / "conf.d" / "30-c.json"))
+    manager.reload(list(manager.configurations))
+    assert settings.b == 2
+    (config,) = manager.configurations.values()
+    assert config.fragments[0] is before[0]
+    assert config.fragments[2].parsed_content is before[2].parsed_content
+    assert parsed == [config.url, "file://" + str(tmp_path / "conf.d" / "20-b.json")]
+
+
+def test_adding_or_removing_a_fragment_reloads_once(tmp_path, write):
+    (tmp_path / "conf.d").mkdir()
+    write("conf.d/10-a.json", {"a": 1})
+    settings = confdoggo.go_catch(Settings, [str(tmp_path / "conf.d")], watch=True)
+    manager = core.roots_registry[Settings]
+    reloads = []
+    reload = manager.reload
+    manager.reload = lambda urls: reloads.append(urls) or reload(urls)
+    path = tmp_path / "conf.d" / "20-b.json"
+    # written aside and renamed, as editors and deployment tools do
+    (tmp_path / "b.json").write_text(json.dumps({"b": 1}))
+    os.rename(str(tmp_path / "b.json"), str(path))
+    wait_for(lambda: settings.b == 1)
+    time.sleep(0.3)
+    assert len(reloads) == 1
+    path.unlink()
+    wait_for(lambda: settings.b == 0)
+    time.sleep(0.3)
+    assert len(reloads) == 2
@@ -0,0 +1,42 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+
+import pytest
+
+from confdoggo.frontends import UnknownBackend, json, yaml
+from confdoggo.utils import MissingLibraryException
+
+
+@pytest.mark.parametrize(
+    "module, frontend", [(json, json.JsonFrontend), (yaml, yaml.YamlFrontend)]
+)
+def test_unknown_backends_list_the_known_ones(module, frontend):
+    with pytest.raises(UnknownBackend) as raised:
+        frontend("simdjson")
+    assert isinstance(raised.value, ValueError)
+    for name in module.backends:
+        assert name in str(raised.value)
+
+
+def test_missing_backends_name_their_package(monkeypatch):
+    # importing a module set to None in sys.modules raises ImportError
+    monkeypatch.setitem(sys.modules, "ujson", None)
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    with pytest.raises(MissingLibraryException, match=r"pip install ujson`"):
+        json.JsonFrontend("ujson")
+    with pytest.raises(MissingLibraryException, match=r"confdoggo\[json\]"):
+        json.JsonFrontend("orjson")
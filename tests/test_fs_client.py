@@ -0,0 +1,32 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+from confdoggo.clients.fs import FileSystemClient
+from confdoggo.frontends import get_frontend
+from confdoggo.utils import Configuration
+
+
+def test_large_file_truncated_after_reading(tmp_path):
+    path = tmp_path / "large.json"
+    document = {f"key{i}": "x" * 100 for i in range(20_000)}
+    path.write_text(json.dumps(document))
+    config = Configuration(url=f"file://{path}")
+    FileSystemClient().go_catch(config, str(path))
+    # parsing a mapping of the file would crash the process
+    path.write_bytes(b"")
+    get_frontend(config.mime_type).parse(config)
+    assert config.parsed_content == document
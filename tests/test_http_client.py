@@ -0,0 +1,155 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import http.server
+import socket
+import threading
+from urllib.parse import urlsplit
+
+import pytest
+
+import confdoggo
+from confdoggo import core
+from confdoggo.clients.http import ConnectionPool, HttpClient
+from confdoggo.core import _parse
+from confdoggo.utils import Configuration
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    # path -> content type (None for no header) and body
+    documents = {
+        "/a.yaml": ("text/plain", b"value: 1"),
+        "/b.json": ("text/x-unknown", b'{"value": 1}'),
+        "/c": ("application/yaml", b"value: 1"),
+        "/d": ("text/yaml; charset=utf-8", b"value: 1"),
+        "/e.yml": (None, b"value: 1"),
+    }
+
+    def do_GET(self):
+        content_type, body = self.documents[self.path]
+        self.send_response(200)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def host():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("path", list(Handler.documents))
+def test_content_types(host, path):
+    pool = ConnectionPool()
+    config = Configuration(url=f"http://{host}{path}")
+    HttpClient("http", pool).go_catch(config, host + path)
+    pool.clear()
+    _parse(config)
+    assert config.parsed_content == {"value": 1}
+
+
+class RecordingPool(ConnectionPool):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def request(self, scheme, host, method, path, headers, timeout=None):
+        self.requests.append(dict(headers))
+        return super().request(scheme, host, method, path, headers, timeout)
+
+
+def test_validators_are_sent_back(tmp_path, http_url):
+    (tmp_path / "a.json").write_text('{"value": 1}')
+    pool = RecordingPool()
+    client = HttpClient("http", pool)
+    url = urlsplit(http_url).netloc + "/a.json"
+    config = Configuration()
+    client.go_catch(config, url)
+    assert config.last_modified is not None
+    assert config.content == '{"value": 1}'
+    again = Configuration(last_modified=config.last_modified)
+    client.go_catch(again, url)
+    assert again.not_modified and again.content is None
+    # the server ignores If-Modified-Since along with If-None-Match
+    client.go_catch(Configuration(etag='"1"', last_modified="date"), url)
+    assert pool.requests[0].keys() == {"Accept-Encoding"}
+    assert pool.requests[1]["If-Modified-Since"] == config.last_modified
+    assert pool.requests[2]["If-None-Match"] == '"1"'
+    assert pool.requests[2]["If-Modified-Since"] == "date"
+    pool.clear()
+
+
+def test_not_modified_sources_are_not_parsed_again(tmp_path, http_url, monkeypatch):
+    (tmp_path / "a.json").write_text('{"value": 1}')
+
+    class Settings(confdoggo.Settings):
+        value: int = 0
+
+    settings = confdoggo.go_catch(Settings, [f"{http_url}/a.json"])
+    calls = []
+    for name in ("_parse", "_parse_settings"):
+        function = getattr(core, name)
+        monkeypatch.setattr(
+            core,
+            name,
+            lambda *args, function=function, name=name: calls.append(name)
+            or function(*args),
+        )
+    manager = core.roots_registry[Settings]
+    manager.reload(list(manager.configurations))
+    assert manager.statistics["not_modified_hits"] == 1
+    assert calls == []
+    assert settings.value == 1
+
+
+def test_idle_connections_are_reused(tmp_path, http_url):
+    (tmp_path / "a.json").write_text('{"value": 1}')
+    pool = ConnectionPool()
+    host = urlsplit(http_url).netloc
+    pool.request("http", host, "GET", "/a.json", {})
+    (connection,) = pool.idle["http", host]
+    sock = connection.sock
+    response, body = pool.request("http", host, "GET", "/a.json", {})
+    assert (response.status, body) == (200, b'{"value": 1}')
+    assert pool.idle["http", host] == [connection]
+    assert connection.sock is sock
+    pool.clear()
+
+
+def test_idle_connections_closed_by_the_server_are_retried(tmp_path, http_url):
+    (tmp_path / "a.json").write_text('{"value": 1}')
+    pool = ConnectionPool()
+    host = urlsplit(http_url).netloc
+    pool.request("http", host, "GET", "/a.json", {})
+    (connection,) = pool.idle["http", host]
+    # as if the server closed the connection while it was idle
+    connection.sock.close()
+    closed, connection.sock = socket.socketpair()
+    closed.close()
+    response, body = pool.request("http", host, "GET", "/a.json", {})
+    assert (response.status, body) == (200, b'{"value": 1}')
+    (new,) = pool.idle["http", host]
+    assert new is not connection
+    pool.clear()
@@ -0,0 +1,156 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import email.message
+import os
+import time
+
+import confdoggo
+from confdoggo.clients import http as http_client
+from confdoggo.utils import Configuration, content_digest
+from confdoggo.watchers import http
+from confdoggo.watchers.hub import hubs
+
+from .conftest import wait_for
+
+
+class Response:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.reason = "reason"
+        self.headers = email.message.Message()
+        for name, value in (headers or {}).items():
+            self.headers[name] = value
+
+    def getheader(self, name):
+        return self.headers.get(name)
+
+
+class Pool:
+    """ Answers every request with `status`, after `delay` seconds. """
+
+    timeout = 10
+
+    def __init__(self, status=304, delay=0, error=None, body=b"{}", headers=None):
+        self.status = status
+        self.delay = delay
+        self.error = error
+        self.body = body
+        self.headers = headers
+        self.requests = []
+
+    def request(self, scheme, host, method, path, headers, timeout=None):
+        self.requests.append(headers)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return Response(self.status, self.headers), self.body
+
+
+def polled(long_poll=None):
+    source = http.PolledSource("http://example.com/a.json", 1, 60, 2, long_poll)
+    # the first check only records the validators
+    source.check(Pool(200))
+    return source
+
+
+def test_long_poll_held_by_the_server_is_sent_again_right_away():
+    source = polled(long_poll=0.05)
+    pool = Pool(304, delay=0.05)
+    assert not source.check(pool)
+    assert pool.requests[-1]["Prefer"] == "wait=0.05"
+    assert source.next_interval(False) == 0
+
+
+def test_long_poll_ignored_by_the_server_falls_back_to_polling():
+    source = polled(long_poll=30)
+    assert not source.check(Pool(304))
+    assert source.next_interval(False) == 2
+    assert source.next_interval(False) == 4
+
+
+def test_errors_back_off_even_when_long_polling():
+    source = polled(long_poll=30)
+    try:
+        source.check(Pool(error=ConnectionError()))
+    except ConnectionError:
+        pass
+    assert source.next_interval(False, failed=True) == 2
+
+
+def test_watch_options_reach_the_watcher(tmp_path, http_url):
+    (tmp_path / "a.json").write_text('{"value": 1}')
+
+    class Settings(confdoggo.Settings):
+        value: int = 0
+
+    confdoggo.go_catch(
+        Settings,
+        [f"{http_url}/a.json"],
+        watch=True,
+        watch_options={"http": {"min_interval": 0.25, "long_poll": 5}},
+    )
+    source = hubs["http"].sources[f"{http_url}/a.json"]
+    assert (source.min_interval, source.long_poll) == (0.25, 5)
+
+
+def test_seeded_sources_are_only_checked_for_changes():
+    source = http.PolledSource("http://example.com/a.json", 1, 60, 2, None)
+    source.seed(Configuration(etag='"1"', digest=content_digest("{}")))
+    pool = Pool(200)
+    assert not source.check(pool)
+    assert pool.requests[-1]["If-None-Match"] == '"1"'
+    assert source.fetched is None
+    changed = Pool(200, body=b'{"value": 2}', headers={"ETag": '"2"'})
+    assert source.check(changed)
+    assert source.etag == source.fetched.etag == '"2"'
+    assert source.fetched.content == '{"value": 2}'
+    assert source.fetched.mime_type == "application/json"
+
+
+def test_changes_are_fetched_once(tmp_path, http_url, monkeypatch):
+    path = tmp_path / "a.json"
+    path.write_text('{"value": 1}')
+    requests = []
+    request = http_client.ConnectionPool.request
+
+    def recorded(pool, scheme, host, method, url, headers, timeout=None):
+        response, body = request(pool, scheme, host, method, url, headers, timeout)
+        requests.append((pool is http_client.pool, headers, response.status))
+        return response, body
+
+    monkeypatch.setattr(http_client.ConnectionPool, "request", recorded)
+
+    class Settings(confdoggo.Settings):
+        value: int = 0
+
+    settings = confdoggo.go_catch(
+        Settings,
+        [f"{http_url}/a.json"],
+        watch=True,
+        debounce=0,
+        watch_options={"http": {"min_interval": 0.05, "backoff": 1}},
+    )
+    wait_for(lambda: len(requests) > 1)
+    # the first poll is conditional, with the validators of the fetch
+    client, headers, status = requests[1]
+    assert not client and "If-Modified-Since" in headers and status == 304
+    path.write_text('{"value": 2}')
+    # Last-Modified is given in seconds
+    future = time.time() + 10
+    os.utime(str(path), (future, future))
+    wait_for(lambda: settings.value == 2)
+    # the reload used the content of the poll that found the change
+    assert [status for client, _, status in requests if client] == [200]
@@ -0,0 +1,133 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+import pytest
+
+from confdoggo.watchers import fs
+
+from .conftest import wait_for
+
+
+def paused(hub_class):
+    class Paused(hub_class):
+        """ Stops once resumed, so that the hub can be started meanwhile. """
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.stopping = threading.Event()
+            self.resume = threading.Event()
+
+        def stop(self, started):
+            self.stopping.set()
+            self.resume.wait(5)
+            super().stop(started)
+
+    return Paused
+
+
+hub_classes = [fs.FileSystemPollHub]
+if fs.has_watchdog:
+    hub_classes.append(fs.FileSystemOSHub)
+
+
+@pytest.mark.parametrize("hub_class", hub_classes)
+def test_hub_started_again_while_stopping(tmp_path, hub_class):
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    key = str(path)
+    hub = paused(hub_class)()
+    if hub_class is fs.FileSystemPollHub:
+        hub.min_interval = hub.max_interval = 0.05
+    changes = []
+
+    def first():
+        pass
+
+    try:
+        hub.subscribe(key, first)
+        # the only subscriber leaves, and the hub stops...
+        unsubscribe = threading.Thread(target=hub.unsubscribe, args=(key, first))
+        unsubscribe.start()
+        assert hub.stopping.wait(5)
+        # ...while another one arrives
+        hub.subscribe(key, lambda: changes.append(key))
+        hub.resume.set()
+        unsubscribe.join(5)
+        path.write_text('{"value": 1}')
+        assert wait_for(lambda: changes)
+    finally:
+        hub.resume.set()
+        hub.shutdown()
+
+
+def test_polls_back_off_while_quiet(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    hub = fs.FileSystemPollHub(min_interval=0.1, max_interval=0.4, backoff=2)
+    hub.watch(str(path))
+    polled = hub.directories[str(tmp_path)]["settings.json"]
+    intervals = []
+    for _ in range(3):
+        assert (
+            hub.update(str(tmp_path), hub.sweep(str(tmp_path), ["settings.json"])) == []
+        )
+        intervals.append(polled.interval)
+    assert intervals == [0.2, 0.4, 0.4]
+    path.write_text('{"value": 1}')
+    assert hub.update(str(tmp_path), hub.sweep(str(tmp_path), ["settings.json"])) == [
+        str(path)
+    ]
+    assert polled.interval == 0.1
+
+
+@pytest.mark.parametrize("scandir_threshold", [1, 100])
+def test_deleted_files_are_reported_once_created_again(tmp_path, scandir_threshold):
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    hub = fs.FileSystemPollHub()
+    hub.scandir_threshold = scandir_threshold
+    hub.watch(str(path))
+
+    def changed():
+        fingerprints = hub.sweep(str(tmp_path), ["settings.json"])
+        return hub.update(str(tmp_path), fingerprints)
+
+    path.unlink()
+    assert changed() == []
+    assert changed() == []
+    path.write_text("{}")
+    assert changed() == [str(path)]
+    assert changed() == []
+
+
+def test_files_deleted_then_created_again_are_reported_once(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    hub = fs.FileSystemPollHub(min_interval=0.02, max_interval=0.02)
+    changes = []
+    hub.subscribe(str(path), lambda: changes.append(str(path)))
+    try:
+        path.unlink()
+        time.sleep(0.1)
+        assert changes == []
+        path.write_text("{}")
+        assert wait_for(lambda: changes)
+        time.sleep(0.1)
+        assert changes == [str(path)]
+    finally:
+        hub.shutdown()
@@ -0,0 +1,85 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+# where confdoggo is imported from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(code: str) -> set:
+    """ The modules imported by running `code` in a new interpreter. """
+    code = (
+        textwrap.dedent(code)
+        + "\nimport json, sys; print(json.dumps(list(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def test_import_is_lazy():
+    modules = imported_modules("import confdoggo")
+    assert "pydantic" not in modules
+    assert "confdoggo.core" not in modules
+    assert "confdoggo.clients" not in modules
+
+
+def test_optional_modules_are_imported_on_first_use(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"value": 1}))
+    modules = imported_modules(
+        f"""
+        import confdoggo
+
+        class Settings(confdoggo.Settings):
+            value: int = 0
+
+        assert confdoggo.go_catch(Settings, [{str(path)!r}]).value == 1
+        """
+    )
+    assert "confdoggo.core" in modules
+    for module in ("yaml", "asyncio", "concurrent.futures", "confdoggo.snapshot"):
+        assert module not in modules
+
+
+def test_submodules_are_imported_on_first_use(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"value": 1}))
+    modules = imported_modules(
+        f"""
+        import confdoggo
+
+        class Settings(confdoggo.Settings):
+            value: int = 0
+
+        handle = confdoggo.shared.go_catch_shared(
+            Settings, [{str(path)!r}], {str(tmp_path / "shared")!r}
+        )
+        assert handle.current().value == 1
+        assert confdoggo.cache.SourceCache
+        confdoggo.shutdown_watchers()
+        """
+    )
+    assert "confdoggo.shared" in modules
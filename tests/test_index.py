@@ -0,0 +1,106 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+from typing import Dict
+
+import pytest
+
+import confdoggo
+from confdoggo import core
+
+
+class Settings(confdoggo.Settings):
+    class _(confdoggo.Settings):
+        host: str = "localhost"
+        port: int = 8080
+
+    server: _ = _()
+    debug: bool = False
+
+
+def test_lookups_see_assignments(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"server": {"port": 80}}))
+    settings = confdoggo.go_catch(Settings, [str(path)])
+    assert settings.get("server.port") == 80
+    settings.server.port = 81
+    settings.debug = True
+    assert settings.get("server.port") == 81
+    assert settings.get_many(["server.port", "debug"]) == [81, True]
+    settings.update({"server": {"host": "example.com"}})
+    assert dict(settings.iter_prefix("server")) == {
+        "server.host": "example.com",
+        "server.port": 81,
+    }
+
+
+def test_reload_after_assignments(write):
+    path = write("settings.json", {"server": {"port": 80}})
+    settings = confdoggo.go_catch(Settings, [path])
+    settings.debug = True
+    write("settings.json", {"server": {"port": 82}}, old=False)
+    core.roots_registry[Settings].reload(
+        list(core.roots_registry[Settings].configurations)
+    )
+    assert settings.get("server.port") == settings.server.port == 82
+    assert settings.get("debug") is settings.debug
+
+
+class Other(confdoggo.Settings):
+    user: str = ""
+
+
+def test_assignments_to_other_trees_keep_the_index(write):
+    settings = confdoggo.go_catch(Settings, [write("settings.json", {})])
+    index = settings._index
+    Other().user = "u"
+    other = confdoggo.go_catch(Other, [write("other.json", {})])
+    other.user = "v"
+    assert settings.get("server.port") == 8080
+    assert settings._index is index
+    settings.server.port = 81
+    assert settings.get("server.port") == 81
+    assert settings._index is not index
+
+
+def test_copy_on_write_reload_tracks_the_new_tree(write):
+    path = write("settings.json", {"server": {"port": 80}})
+    handle = confdoggo.go_catch(Settings, [path], copy_on_write=True)
+    manager = core.roots_registry[Settings]
+    write("settings.json", {"server": {"port": 80}, "debug": True}, old=False)
+    manager.reload(list(manager.configurations))
+    settings = handle.current()
+    assert settings.get("debug") is True
+    # the server section was not changed by the reload, nor indexed again
+    settings.server.port = 81
+    assert settings.get("server.port") == 81
+
+
+class Flags(confdoggo.Settings):
+    flags: Dict[str, bool] = {}
+
+
+def test_values_in_mappings_are_found_by_walking(write):
+    settings = confdoggo.go_catch(
+        Flags, [write("flags.json", {"flags": {"beta": True}})]
+    )
+    assert settings.get("flags") == {"beta": True}
+    assert "flags.beta" not in settings._index.values
+    assert settings.get("flags.beta") is True
+    assert settings.get_many(["flags.beta"]) == [True]
+    assert settings.get("flags.gamma", None) is None
+    with pytest.raises(KeyError):
+        settings.get("flags.gamma")
@@ -0,0 +1,126 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pydantic
+import pytest
+
+import confdoggo
+from confdoggo import core, lazy
+
+
+class Database(confdoggo.Settings):
+    host: str = "localhost"
+    port: int = 5432
+
+
+class Cache(confdoggo.Settings):
+    class _(confdoggo.Settings):
+        size: int = 0
+
+    ttl: int = 60
+    memory: _ = _()
+
+
+class Settings(confdoggo.Settings):
+    name: str = "app"
+    database: Database = Database()
+    cache: Cache = Cache()
+
+
+def errors(e: pydantic.ValidationError) -> set:
+    return {(error["loc"], error["type"]) for error in e.errors()}
+
+
+def test_sections_are_validated_on_first_access():
+    data = {"name": "x", "database": {"port": "bad"}, "cache": {"ttl": 1}}
+    settings = lazy.parse_lazy(Settings, data)
+    assert settings.name == "x"
+    assert lazy.pending(settings) == ["database", "cache"]
+    assert repr(settings).endswith("database=<not validated>, cache=<not validated>)")
+    assert settings.cache.ttl == 1
+    assert lazy.pending(settings) == ["database"]
+    with pytest.raises(pydantic.ValidationError) as e:
+        settings.database
+    assert errors(e.value) == {(("database", "port"), "type_error.integer")}
+    # still pending, and failing, until fixed
+    assert lazy.pending(settings) == ["database"]
+
+
+def test_eager_fields_are_validated_at_once():
+    with pytest.raises(pydantic.ValidationError) as e:
+        lazy.parse_lazy(Settings, {"name": [], "database": {"port": "bad"}})
+    assert errors(e.value) == {(("name",), "type_error.str")}
+
+
+def test_sections_without_data_are_not_lazy():
+    settings = lazy.parse_lazy(Settings, {"database": {"port": 1}})
+    assert lazy.pending(settings) == ["database"]
+    assert settings.cache == Cache()
+    assert settings.database.port == 1
+    assert lazy.pending(settings) == []
+    assert settings._lazy is None
+
+
+def test_validate_all_raises_every_error():
+    data = {
+        "database": {"port": "bad"},
+        "cache": {"ttl": "bad", "memory": {"size": "bad"}},
+    }
+    settings = lazy.parse_lazy(Settings, data)
+    with pytest.raises(pydantic.ValidationError) as e:
+        settings.validate_all()
+    assert errors(e.value) == {
+        (("database", "port"), "type_error.integer"),
+        (("cache", "ttl"), "type_error.integer"),
+        (("cache", "memory", "size"), "type_error.integer"),
+    }
+    valid = lazy.parse_lazy(Settings, {"cache": {"memory": {"size": 1}}})
+    assert valid.validate_all() is valid
+    assert valid.cache.memory.size == 1
+    assert lazy.pending(valid) == lazy.pending(valid.cache) == []
+
+
+def test_exports_validate_every_section():
+    settings = lazy.parse_lazy(Settings, {"database": {"port": 1}})
+    assert settings.dict()["database"] == {"host": "localhost", "port": 1}
+    assert settings == Settings(database={"port": 1})
+
+
+def test_lazy_reload_replaces_changed_sections(write):
+    path = write(
+        "settings.json", {"database": {"port": 1}, "cache": {"ttl": 1}, "name": "a"}
+    )
+    settings = confdoggo.go_catch(Settings, [path], lazy=True)
+    database = settings.database
+    assert lazy.pending(settings) == ["cache"]
+    write(
+        "settings.json",
+        {"database": {"port": 1}, "cache": {"ttl": "bad"}, "name": "b"},
+        old=False,
+    )
+    manager = core.roots_registry[Settings]
+    manager.reload(list(manager.configurations))
+    assert settings.name == "b"
+    # unchanged sections are kept, changed ones are validated on access
+    assert settings.database is database
+    assert lazy.pending(settings) == ["cache"]
+    with pytest.raises(pydantic.ValidationError):
+        settings.cache
+    write("settings.json", {"database": {"port": 2}, "cache": {"ttl": 2}}, old=False)
+    manager.reload(list(manager.configurations))
+    assert set(lazy.pending(settings)) == {"database", "cache"}
+    assert settings.database.port == 2
+    assert settings.cache.ttl == 2
+    assert settings.name == "app"
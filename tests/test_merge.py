@@ -0,0 +1,41 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from confdoggo.merge import InvalidLayerException, merge_configurations
+from confdoggo.utils import Configuration
+
+
+def layers(*documents):
+    return [
+        Configuration(url=f"file://{i}.json", parsed_content=document)
+        for i, document in enumerate(documents)
+    ]
+
+
+def test_later_layers_override_earlier_ones():
+    base = {"server": {"host": "localhost", "port": 80}, "tags": ["a"]}
+    merged = merge_configurations(
+        layers(base, None, {"server": {"port": 81}, "tags": ["b"]})
+    )
+    assert merged == {"server": {"host": "localhost", "port": 81}, "tags": ["b"]}
+    # layers are not modified
+    assert base["server"]["port"] == 80
+
+
+def test_layers_must_be_mappings():
+    with pytest.raises(InvalidLayerException):
+        merge_configurations(layers({}, ["not", "a", "mapping"]))
@@ -0,0 +1,99 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import subprocess
+import sys
+import textwrap
+import time
+
+from confdoggo import shared
+
+from .conftest import wait_for
+from .test_imports import ROOT
+
+# the settings published by the owner are those written to its stdin
+OWNER = """
+import sys
+import confdoggo
+from confdoggo.clients import BaseClient, clients_registry
+
+class StdinClient(BaseClient):
+    def go_catch(self, config, url):
+        config.content = sys.stdin.readline()
+        config.mime_type = "application/json"
+
+clients_registry["stdin"] = StdinClient
+
+class Settings(confdoggo.Settings):
+    {field}
+
+confdoggo.shared.go_catch_shared(Settings, ["stdin://settings"], {path!r})
+print("published", flush=True)
+# keeps owning the file until stdin is closed
+sys.stdin.read()
+"""
+
+READER = """
+import confdoggo
+
+class Settings(confdoggo.Settings):
+    value: int = 0
+
+handle = confdoggo.shared.go_catch_shared(Settings, [], {path!r}, timeout=10)
+print(handle.current().value, flush=True)
+"""
+
+
+def start(code, **kwargs):
+    return subprocess.Popen(
+        [sys.executable, "-c", textwrap.dedent(code).format(**kwargs)],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+
+
+def publish(owner, document):
+    owner.stdin.write(document + "\n")
+    owner.stdin.flush()
+    assert owner.stdout.readline() == "published\n"
+
+
+def reset(path):
+    with open(path, "rb") as f:
+        return f.read(len(shared.MAGIC)) != shared.MAGIC
+
+
+def test_readers_wait_for_the_new_owner(tmp_path):
+    path = str(tmp_path / "shared")
+    # previous deployments, with the same schema, then with another one
+    previous_deployments = (("value: int = 0", '{"value": 1}'), ("old = ''", "{}"))
+    for field, document in previous_deployments:
+        previous = start(OWNER, field=field, path=path)
+        publish(previous, document)
+        previous.communicate()
+        assert not reset(path)
+
+        owner = start(OWNER, field="value: int = 0", path=path)
+        wait_for(lambda: reset(path))
+        reader = start(READER, path=path)
+        # the reader waits rather than serve or fail on the previous settings
+        time.sleep(0.3)
+        assert reader.poll() is None
+        publish(owner, '{"value": 2}')
+        assert reader.communicate(timeout=10)[0] == "2\n"
+        assert reader.returncode == 0
+        owner.communicate()
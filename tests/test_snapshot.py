@@ -0,0 +1,60 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Dict, List, Union
+
+import confdoggo
+from confdoggo import snapshot
+
+
+class Flag(confdoggo.Settings):
+    enabled: bool = False
+    owners: List[str] = []
+
+
+class A(confdoggo.Settings):
+    a: int = 0
+
+
+class B(confdoggo.Settings):
+    b: int = 0
+
+
+class Flags(confdoggo.Settings):
+    flags: Dict[str, Flag] = {}
+    default: Flag = Flag()
+    either: Union[A, B] = A()
+
+
+def test_loaded_from_a_snapshot(tmp_path, write):
+    path = write(
+        "flags.json",
+        {"flags": {"x": {"enabled": True, "owners": ["a"]}}, "either": {"b": 1}},
+    )
+    snapshots = tmp_path / "snapshots"
+    loaded = confdoggo.go_catch(Flags, [path], snapshot_dir=snapshots)
+    cached = snapshot.load(snapshots, Flags, ["file://" + path])
+    assert cached is not None
+    settings, _ = cached
+    assert settings == loaded
+    assert isinstance(settings.flags["x"], Flag)
+
+
+def test_schema_fingerprints_are_not_inherited():
+    class Child(Flags):
+        extra: int = 0
+
+    assert snapshot.schema_fingerprint(Flags) == snapshot.schema_fingerprint(Flags)
+    assert snapshot.schema_fingerprint(Child) != snapshot.schema_fingerprint(Flags)
@@ -0,0 +1,58 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+import confdoggo
+from confdoggo import core
+
+
+class Settings(confdoggo.Settings):
+    value: int = 0
+
+
+def test_shutdown_during_a_reload(fake):
+    fake.documents["a"] = {"value": 1}
+    settings = confdoggo.go_catch(Settings, ["fake://a"], watch=True, debounce=0)
+    manager = core.roots_registry[Settings]
+    (watcher,) = fake.watchers
+    fake.documents["a"] = {"value": 2}
+    with manager.lock:
+        # the reload waits for the lock of the root, then the source's
+        watcher.fire()
+        watcher.events[0].join(0.2)
+        shutdown = threading.Thread(target=confdoggo.shutdown_watchers, daemon=True)
+        shutdown.start()
+        shutdown.join(0.2)
+    shutdown.join(5)
+    assert not shutdown.is_alive()
+    assert settings.value == 2
+
+
+def test_paths_of_a_file_share_a_source(tmp_path, write, monkeypatch):
+    write("common.json", {"value": 1})
+    monkeypatch.chdir(tmp_path)
+
+    class Other(confdoggo.Settings):
+        value: int = 0
+
+    confdoggo.go_catch(Settings, ["common.json"])
+    confdoggo.go_catch(Other, ["./common.json", str(tmp_path / "common.json")])
+    assert list(core.sources.sources) == [
+        ("file://" + str(tmp_path / "common.json"), None)
+    ]
+    assert list(core.roots_registry[Other].configurations) == [
+        "file://" + str(tmp_path / "common.json")
+    ]
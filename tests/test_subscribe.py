@@ -0,0 +1,103 @@
+#  Copyright (C) 2020  The confdoggo Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Dict, Optional
+
+import pydantic
+
+import confdoggo
+from confdoggo import core
+
+
+class Server(confdoggo.Settings):
+    host: str = "localhost"
+    port: int = 8080
+
+
+class Settings(confdoggo.Settings):
+    server: Server = Server()
+    replica: Optional[Server] = None
+    limits: Dict[str, int] = {}
+    debug: bool = pydantic.Field(False, alias="DEBUG")
+
+
+def reloaded(write, settings_class, before, after, paths):
+    path = write("settings.json", before)
+    confdoggo.go_catch(settings_class, [path])
+    manager = core.roots_registry[settings_class]
+    received = {}
+    for subscribed in paths:
+        confdoggo.subscribe(
+            settings_class,
+            subscribed,
+            lambda changes, subscribed=subscribed: received.setdefault(
+                subscribed, []
+            ).extend(
+                (change.dotted_path, change.old, change.new) for change in changes
+            ),
+        )
+    write("settings.json", after, old=False)
+    manager.reload(list(manager.configurations))
+    return received
+
+
+def test_parents_of_changed_paths_are_notified(write):
+    received = reloaded(
+        write,
+        Settings,
+        {"server": {"port": 1}, "limits": {"a": 1}},
+        {"server": {"port": 2}, "limits": {"a": 2}, "DEBUG": True},
+        ["server.port", "server", "", "server.host", "limits.a", "debug"],
+    )
+    assert received == {
+        "server.port": [("server.port", 1, 2)],
+        "server": [("server.port", 1, 2)],
+        "": [("server.port", 1, 2), ("limits.a", 1, 2), ("debug", False, True)],
+        "limits.a": [("limits.a", 1, 2)],
+        "debug": [("debug", False, True)],
+    }
+
+
+def test_paths_of_whole_sections_are_notified(write):
+    section = {"host": "localhost", "port": 1}
+    received = reloaded(
+        write,
+        Settings,
+        {},
+        {"replica": {"port": 1}},
+        ["replica", "replica.port", "server.port"],
+    )
+    assert received == {
+        "replica": [("replica", None, section)],
+        "replica.port": [("replica", None, section)],
+    }
+    core.roots_registry.clear()
+    received = reloaded(write, Settings, {"replica": {"port": 1}}, {}, ["replica.host"])
+    assert received == {"replica.host": [("replica", section, None)]}
+
+
+class Derived(confdoggo.Settings):
+    port: int = 0
+    url: str = ""
+
+    @pydantic.root_validator
+    def default_url(cls, values):
+        values["url"] = values["url"] or f"http://localhost:{values['port']}"
+        return values
+
+
+def test_fields_derived_from_others_are_notified(write):
+    received = reloaded(write, Derived, {"port": 1}, {"port": 2}, ["url"])
+    assert received == {"url": [("url", "http://localhost:1", "http://localhost:2")]}